@@ -1,16 +1,95 @@
+import gc
+import click
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 from app.config.config import Config
+from app.config.database import configure_engine_options, register_engine_events
 from app.routes import register_routes
+from app.routes.lazy_view import resolve_lazy_views
 from app.models import db
+from app.models.migrations import init_migrations
+from app.models.routing import init_routing
+from app.models.async_db import async_db
+from app.middlewares.instrumentation import init_instrumentation
+from app.utils.user_cache import user_cache
+from app.utils.token_cache import token_cache
+from app.utils.hashing import password_hasher
+from app.utils.response_cache import response_cache
+from app.utils.rate_limit import rate_limiter
+from app.utils.membership import membership_index
+from app.utils.token_versions import token_versions
+from app.utils.post_commit import post_commit
+from app.cli import users_cli, startup_cli
+from app.utils.startup import StartupProfile
+from app.utils.json_provider import FastJSONProvider
 
 def create_app(config_class=Config):
+    profile = StartupProfile()
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = FastJSONProvider(app)
+    app.extensions['startup_profile'] = profile
+    # Without this the logger inherits WARNING from an unconfigured root logger, and the INFO
+    # startup logs (effective engine settings, membership index build) never appear
+    app.logger.setLevel(app.config['LOG_LEVEL'])
+    profile.mark('config')
+    
+    # Behind reverse proxies, take the client address and scheme from their X-Forwarded headers
+    hops = app.config['TRUSTED_PROXY_HOPS']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
     
     # Initialize extensions
+    configure_engine_options(app)
     db.init_app(app)
+    init_routing(app)
+    async_db.init_app(app)
+    with app.app_context():
+        register_engine_events(app, db.engines)
+        init_instrumentation(app, list(db.engines.values()) + async_db.sync_engines(app))
+    profile.mark('database')
+    
+    # Migrations are only needed by the `flask db` commands (and init_db.py, which sets them up itself)
+    if click.get_current_context(silent=True) is not None:
+        init_migrations(app)
+        profile.mark('migrations')
     
-    # Register routes
+    user_cache.init_app(app)
+    token_cache.init_app(app)
+    password_hasher.init_app(app)
+    response_cache.init_app(app)
+    rate_limiter.init_app(app)
+    membership_index.init_app(app)
+    token_versions.init_app(app)
+    post_commit.init_app(app)
+    profile.mark('extensions')
+    
+    # Register routes; controllers are imported on first request
     register_routes(app)
+    profile.mark('routes')
+    
+    # Register CLI commands
+    app.cli.add_command(users_cli)
+    app.cli.add_command(startup_cli)
+    
+    if app.config['PRELOAD_APP']:
+        _preload(app)
+        profile.mark('preload')
     
     return app
+
+
+def _preload(app):
+    # For `gunicorn --preload`: do one-off work in the master so forked workers share it
+    # copy-on-write instead of repeating it
+    resolve_lazy_views(app)
+    with app.app_context():
+        membership_index.warm()
+        # Connections must not cross the fork; each worker opens its own
+        for engine in db.engines.values():
+            engine.dispose()
+    
+    # Move everything allocated so far out of the collector's reach, so GC passes in the
+    # workers don't touch (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
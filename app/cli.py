@@ -0,0 +1,96 @@
+import json
+import os
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app.models import db
+from app.utils.user_import import import_users, parse_ndjson, summarize
+from app.utils.query_plans import check_access_paths
+from app.utils.change_feed import prune_changes
+from app.utils.startup import profile_startup, package_totals
+
+users_cli = AppGroup('users', help='User management commands.')
+startup_cli = AppGroup('startup', help='Startup diagnostics.')
+
+
+@users_cli.command('import')
+@click.argument('source', type=click.File('r'))
+@click.option('--batch-size', type=int, default=None, help='Rows per INSERT batch.')
+@click.option('--workers', type=int, default=None, help='Processes used for password hashing.')
+@click.option('--report', type=click.File('w'), default=None, help='Write the per-row report as JSON.')
+def import_command(source, batch_size, workers, report):
+    """Import users from a JSON array or NDJSON file."""
+    first = source.read(1)
+    while first and first.isspace():
+        first = source.read(1)
+    
+    if first == '[':
+        rows = json.loads(first + source.read())
+    else:
+        rows = parse_ndjson(_prepend(first, source))
+    
+    results = import_users(
+        rows,
+        batch_size=batch_size or current_app.config['USER_IMPORT_BATCH_SIZE'],
+        workers=workers if workers is not None else current_app.config['USER_IMPORT_HASH_WORKERS']
+    )
+    summary = summarize(results)
+    
+    if report:
+        json.dump(summary, report)
+    click.echo(f"Created {summary['created']} users, {summary['failed']} failed")
+
+
+@users_cli.command('explain')
+@click.option('--verbose', is_flag=True, help='Print the full plan for every query.')
+def explain_command(verbose):
+    """Check that the API's user queries use their intended indexes."""
+    failures = 0
+    for name, indexes, uses_index, plan in check_access_paths(db.engine):
+        click.echo(f"{'ok  ' if uses_index else 'FAIL'} {name} -> {', '.join(indexes)}")
+        if verbose or not uses_index:
+            click.echo('\n'.join(f'       {line}' for line in plan.splitlines()))
+        failures += not uses_index
+    
+    if failures:
+        raise click.ClickException(f'{failures} quer{"y does" if failures == 1 else "ies do"} not use the expected index')
+
+
+@users_cli.command('prune-changes')
+@click.option('--older-than-days', type=int, default=None, help='Retention in days (default CHANGE_FEED_RETENTION_DAYS).')
+def prune_changes_command(older_than_days):
+    """Delete change feed entries older than the retention period."""
+    days = older_than_days if older_than_days is not None else current_app.config['CHANGE_FEED_RETENTION_DAYS']
+    click.echo(f'Deleted {prune_changes(days)} change feed entries older than {days} days')
+
+
+def _prepend(first, source):
+    first_line = first + source.readline()
+    yield first_line
+    yield from source
+
+
+@startup_cli.command('profile')
+@click.option('--runs', type=int, default=3, help='Fresh interpreters to time; the median run is reported.')
+@click.option('--top', type=int, default=15, help='Number of imports and packages to list.')
+@click.option('--preload', is_flag=True, help='Profile with PRELOAD_APP enabled.')
+def profile_command(runs, top, preload):
+    """Report import time and the create_app phase breakdown."""
+    root = os.path.dirname(current_app.root_path)
+    result = profile_startup(root, runs=runs, env={'PRELOAD_APP': 'true' if preload else 'false'})
+    
+    click.echo(f"Startup: {result['median_total'] * 1000:.1f}ms median of {runs} "
+               f"({', '.join(f'{total * 1000:.0f}' for total in result['totals'])}ms)")
+    click.echo(f"  import app   {result['import'] * 1000:8.1f}ms")
+    click.echo(f"  create_app   {result['create_app'] * 1000:8.1f}ms")
+    for phase, seconds in result['phases']:
+        click.echo(f"    {phase:<10} {seconds * 1000:8.1f}ms")
+    
+    click.echo('Slowest imports (cumulative):')
+    imports = sorted(result['imports'], key=lambda entry: entry[2], reverse=True)
+    for module, _, cumulative_us in imports[:top]:
+        click.echo(f'  {cumulative_us / 1000:8.1f}ms  {module}')
+    
+    click.echo('Import time by package (self):')
+    for package, self_us in package_totals(result['imports'])[:top]:
+        click.echo(f'  {self_us / 1000:8.1f}ms  {package}')
@@ -4,4 +4,161 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Refresh tokens last JWT_EXPIRATION_HOURS; the access tokens they mint are short-lived and
+    # authorize from their role/version claims alone
     JWT_EXPIRATION_HOURS = 24
+    JWT_ACCESS_EXPIRATION_MINUTES = int(os.environ.get('JWT_ACCESS_EXPIRATION_MINUTES', 15))
+    # Revocations (users.token_version bumps) made by other workers apply within the interval
+    TOKEN_VERSION_SYNC_INTERVAL = float(os.environ.get('TOKEN_VERSION_SYNC_INTERVAL', 1))
+    TOKEN_VERSION_SYNC_OVERLAP = float(os.environ.get('TOKEN_VERSION_SYNC_OVERLAP', 5))
+
+    # Pagination and streaming for GET /api/users
+    USERS_PAGE_SIZE = int(os.environ.get('USERS_PAGE_SIZE', 100))
+    USERS_MAX_PAGE_SIZE = int(os.environ.get('USERS_MAX_PAGE_SIZE', 1000))
+    USERS_STREAM_BATCH_SIZE = int(os.environ.get('USERS_STREAM_BATCH_SIZE', 1000))
+    # Most ids accepted by POST /api/users/batch
+    USERS_BATCH_MAX_IDS = int(os.environ.get('USERS_BATCH_MAX_IDS', 500))
+
+    # Authenticated-user cache used by token_required/admin_required
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+    # Verified-JWT decode cache; entries never outlive the token's exp
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+    TOKEN_CACHE_MAX_TTL = int(os.environ.get('TOKEN_CACHE_MAX_TTL', 300))
+
+    # Password hashing: Werkzeug method string (e.g. 'pbkdf2:sha256:600000', 'scrypt:32768:8:1')
+    # and an optional process pool; PASSWORD_HASH_WORKERS=0 hashes on the request thread
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2')
+    PASSWORD_HASH_SALT_LENGTH = int(os.environ.get('PASSWORD_HASH_SALT_LENGTH', 16))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 16))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+    PASSWORD_HASH_RETRY_AFTER = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER', 1))
+    # Host-wide cap on concurrent hashes and verifies across all workers, held as lock files
+    # in SLOTS_DIR; calls over it get a 503 at once. The pool's queue bound is per process, and
+    # a gunicorn sync worker only hashes one request at a time, so under sync workers this is
+    # the admission control: at most HOST_LIMIT workers are busy on KDF work and the rest keep
+    # serving other requests. One per core by default; 0 disables.
+    PASSWORD_HASH_HOST_LIMIT = int(os.environ.get('PASSWORD_HASH_HOST_LIMIT', os.cpu_count() or 1))
+    PASSWORD_HASH_SLOTS_DIR = os.environ.get('PASSWORD_HASH_SLOTS_DIR', '/tmp/user-api-kdf-slots')
+
+    # Bulk user import (POST /api/users/bulk and `flask users import`). Passwords are hashed on
+    # a separate pool of HASH_WORKERS processes. The endpoint accepts at most MAX_ROWS, by
+    # default about 20s of hashing at the default KDF cost; larger imports use the CLI.
+    USER_IMPORT_BATCH_SIZE = int(os.environ.get('USER_IMPORT_BATCH_SIZE', 1000))
+    USER_IMPORT_HASH_WORKERS = int(os.environ.get('USER_IMPORT_HASH_WORKERS', os.cpu_count() or 1))
+    USER_IMPORT_MAX_ROWS = int(os.environ.get('USER_IMPORT_MAX_ROWS', 50 * USER_IMPORT_HASH_WORKERS))
+
+    # Database engine tuning; merged into SQLALCHEMY_ENGINE_OPTIONS per backend at startup
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true')
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+    # Read replicas (comma-separated URLs). GET handlers and auth lookups read from them;
+    # writers stay on the primary for REPLICA_READ_YOUR_WRITES_SECONDS after committing. The pin
+    # is a signed cookie, so it holds on every worker; clients that drop cookies are only pinned
+    # on the worker that took the write.
+    # Locally: DATABASE_URL=sqlite:///primary.db DATABASE_REPLICA_URLS=sqlite:///replica.db
+    DATABASE_REPLICA_URLS = [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url]
+    REPLICA_READ_YOUR_WRITES_SECONDS = int(os.environ.get('REPLICA_READ_YOUR_WRITES_SECONDS', 5))
+
+    # Response cache for user reads: 'memory' (per process), 'filesystem' or 'redis' (shared), or 'none'
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 10000))
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 30))
+    # Entries built from a replica may predate the last write, so they live only this long
+    RESPONSE_CACHE_REPLICA_TTL = int(os.environ.get('RESPONSE_CACHE_REPLICA_TTL', 2))
+    RESPONSE_CACHE_GENERATION_TTL = int(os.environ.get('RESPONSE_CACHE_GENERATION_TTL', 3600))
+    RESPONSE_CACHE_DIR = os.environ.get('RESPONSE_CACHE_DIR', '/tmp/user-api-cache')
+    RESPONSE_CACHE_REDIS_URL = os.environ.get('RESPONSE_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+    # Level of the 'app' logger (and 'app.audit' below it)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+    # Request timing and SQL query-count instrumentation
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'true').lower() == 'true'
+    SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', 'true').lower() == 'true'
+    SLOW_REQUEST_LOG = os.environ.get('SLOW_REQUEST_LOG', 'false').lower() == 'true'
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+    SLOW_REQUEST_QUERY_COUNT = int(os.environ.get('SLOW_REQUEST_QUERY_COUNT', 20))
+
+    # Prometheus /metrics; set METRICS_MULTIPROC_DIR under gunicorn so scrapes cover all workers.
+    # Counters in the directory outlive the workers that wrote them, so it must be emptied before
+    # each server start: the hooks in gunicorn.conf.py do that (and archive exited workers);
+    # under other servers, clear it in the start script.
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+
+    # Async handlers on an async SQLAlchemy engine (see asgi.py)
+    ASYNC_HANDLERS = os.environ.get('ASYNC_HANDLERS', 'false').lower() == 'true'
+    ASYNC_DB_POOLED = False
+
+    # Token-bucket rate limits ('<count>/<second|minute|hour|day>', empty to disable a scope),
+    # checked before any user lookup or password hashing. 'sqlite' shares buckets across workers.
+    # Per-IP buckets key on the client address: behind a reverse proxy or load balancer set
+    # TRUSTED_PROXY_HOPS to the number of proxies in front of the app, or every client shares
+    # the proxy's bucket. Only count proxies you control; each trusted hop's X-Forwarded-For
+    # entry is believed.
+    TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'memory')
+    RATE_LIMIT_SQLITE_PATH = os.environ.get('RATE_LIMIT_SQLITE_PATH', '/tmp/user-api-ratelimit.db')
+    LOGIN_RATE_LIMIT_PER_IP = os.environ.get('LOGIN_RATE_LIMIT_PER_IP', '30/minute')
+    LOGIN_RATE_LIMIT_PER_USERNAME = os.environ.get('LOGIN_RATE_LIMIT_PER_USERNAME', '5/minute')
+    SIGNUP_RATE_LIMIT_PER_IP = os.environ.get('SIGNUP_RATE_LIMIT_PER_IP', '10/minute')
+    SIGNUP_RATE_LIMIT_PER_USERNAME = os.environ.get('SIGNUP_RATE_LIMIT_PER_USERNAME', '3/minute')
+
+    # Bloom filter of usernames/emails answering definite misses on login without a query.
+    # Memory is roughly -capacity * ln(error_rate) / ln(2)^2 bits (about 1.2 MB per million keys at 1%).
+    # Writes from other workers reach a worker's filter through an indexed delta sync of rows
+    # updated since the last one (less SYNC_OVERLAP seconds). A miss runs one only if the last
+    # is SYNC_INTERVAL seconds old, so misses cost at most one query per interval per worker,
+    # and a name created on another worker can be refused for up to SYNC_INTERVAL seconds.
+    # 0 confirms every miss.
+    MEMBERSHIP_INDEX_ENABLED = os.environ.get('MEMBERSHIP_INDEX_ENABLED', 'true').lower() == 'true'
+    MEMBERSHIP_INDEX_CAPACITY = int(os.environ.get('MEMBERSHIP_INDEX_CAPACITY', 2000000))
+    MEMBERSHIP_INDEX_ERROR_RATE = float(os.environ.get('MEMBERSHIP_INDEX_ERROR_RATE', 0.01))
+    MEMBERSHIP_INDEX_SYNC_INTERVAL = float(os.environ.get('MEMBERSHIP_INDEX_SYNC_INTERVAL', 1))
+    MEMBERSHIP_INDEX_SYNC_OVERLAP = float(os.environ.get('MEMBERSHIP_INDEX_SYNC_OVERLAP', 5))
+
+    # List-cache invalidation and audit events for user writes run on a background thread in
+    # batches; cached list pages may lag a write by up to the flush interval. Audit events go
+    # to the 'app.audit' logger.
+    POST_COMMIT_ASYNC = os.environ.get('POST_COMMIT_ASYNC', 'true').lower() == 'true'
+    POST_COMMIT_FLUSH_INTERVAL = float(os.environ.get('POST_COMMIT_FLUSH_INTERVAL', 0.05))
+    POST_COMMIT_BATCH_SIZE = int(os.environ.get('POST_COMMIT_BATCH_SIZE', 500))
+    POST_COMMIT_QUEUE_SIZE = int(os.environ.get('POST_COMMIT_QUEUE_SIZE', 10000))
+    AUDIT_LOG_ENABLED = os.environ.get('AUDIT_LOG_ENABLED', 'true').lower() == 'true'
+
+    # GET /api/users/changes. Entries past a sequence gap are held back until they are
+    # SETTLE_SECONDS old, so a transaction that commits out of order isn't skipped.
+    # An SSE response sends what is available and closes; EventSource reconnects after
+    # POLL_INTERVAL. A non-zero SSE_TIMEOUT instead holds the stream open and polls for that
+    # long, occupying a whole worker under gunicorn's default sync workers: only raise it
+    # with threaded (--threads), gevent or ASGI workers.
+    CHANGE_FEED_PAGE_SIZE = int(os.environ.get('CHANGE_FEED_PAGE_SIZE', 1000))
+    CHANGE_FEED_MAX_PAGE_SIZE = int(os.environ.get('CHANGE_FEED_MAX_PAGE_SIZE', 10000))
+    CHANGE_FEED_SETTLE_SECONDS = float(os.environ.get('CHANGE_FEED_SETTLE_SECONDS', 5))
+    CHANGE_FEED_SSE_TIMEOUT = float(os.environ.get('CHANGE_FEED_SSE_TIMEOUT', 0))
+    CHANGE_FEED_POLL_INTERVAL = float(os.environ.get('CHANGE_FEED_POLL_INTERVAL', 1))
+    CHANGE_FEED_RETENTION_DAYS = int(os.environ.get('CHANGE_FEED_RETENTION_DAYS', 30))
+
+    # Set with `gunicorn --preload`: controllers, the membership index and other startup work
+    # are loaded once in the master and shared copy-on-write by the forked workers
+    PRELOAD_APP = os.environ.get('PRELOAD_APP', 'false').lower() == 'true'
+
+
+class AsgiConfig(Config):
+    ASYNC_HANDLERS = True
+    ASYNC_DB_POOLED = True
+    # Threads running WSGI calls in asgi.py, per worker; further requests queue for one
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 32))
@@ -0,0 +1,102 @@
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from app.utils.metrics import registry
+
+
+# QueuePool that records how long callers wait for a connection (db_pool_wait_seconds)
+class TimedQueuePool(QueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            registry.observe('db_pool_wait_seconds', time.perf_counter() - start)
+
+
+def _env_bool(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+def engine_options_for(uri, config, overrides=None):
+    backend = make_url(uri).get_backend_name()
+    
+    if backend == 'sqlite':
+        # SQLite uses a per-file lock; wait for it instead of failing with "database is locked"
+        options = {
+            'connect_args': {
+                'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000,
+                'check_same_thread': False
+            }
+        }
+    else:
+        options = {
+            'poolclass': TimedQueuePool,
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': _env_bool(config['DB_POOL_PRE_PING'])
+        }
+        timeout = config['DB_STATEMENT_TIMEOUT_MS']
+        if backend == 'postgresql' and timeout:
+            options['connect_args'] = {'options': f'-c statement_timeout={timeout}'}
+        elif backend == 'mysql' and timeout:
+            options['connect_args'] = {'init_command': f'SET SESSION max_execution_time={timeout}'}
+    
+    # Explicit SQLALCHEMY_ENGINE_OPTIONS always win over the preset
+    options.update(overrides or {})
+    return options
+
+
+def configure_engine_options(app):
+    overrides = app.config.get('SQLALCHEMY_ENGINE_OPTIONS')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_for(
+        app.config['SQLALCHEMY_DATABASE_URI'], app.config, overrides
+    )
+    
+    # Read replicas become binds named replica_<n>; see app/models/routing.py
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for index, url in enumerate(app.config.get('DATABASE_REPLICA_URLS') or []):
+        binds[f'replica_{index}'] = {'url': url, **engine_options_for(url, app.config, overrides)}
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+
+def _sqlite_pragmas(config):
+    return {
+        'journal_mode': config['SQLITE_JOURNAL_MODE'],
+        'synchronous': config['SQLITE_SYNCHRONOUS'],
+        'busy_timeout': config['SQLITE_BUSY_TIMEOUT_MS'],
+        'foreign_keys': 'ON'
+    }
+
+
+def _apply_sqlite_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return on_connect
+
+
+def register_engine_events(app, engines):
+    pragmas = _sqlite_pragmas(app.config)
+    for key, engine in engines.items():
+        settings = {'pool': type(engine.pool).__name__}
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _apply_sqlite_pragmas(pragmas))
+            settings.update(pragmas)
+        else:
+            options = app.config['SQLALCHEMY_ENGINE_OPTIONS'] if key is None else app.config['SQLALCHEMY_BINDS'][key]
+            settings.update({
+                name: value for name, value in options.items()
+                if name not in ('url', 'connect_args', 'poolclass')
+            })
+        app.logger.info(
+            'Database engine %s (%s): %s',
+            key or 'primary',
+            engine.url.render_as_string(hide_password=True),
+            ', '.join(f'{name}={value}' for name, value in settings.items())
+        )
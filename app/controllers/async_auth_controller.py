@@ -0,0 +1,36 @@
+import asyncio
+from flask import request, jsonify
+from app.models import db
+from app.models.async_db import async_db
+from app.models.user import User
+from app.controllers.auth_controller import AuthController
+from app.utils.hashing import password_hasher
+from app.middlewares.rate_limit_middleware import rate_limited
+from app.utils.membership import membership_index
+
+class AsyncAuthController:
+    @staticmethod
+    @rate_limited('login')
+    async def login():
+        data = request.get_json()
+        
+        if not data or not all(k in data for k in ('username', 'password')):
+            return jsonify({"error": "Missing username or password"}), 400
+        
+        # Unknown usernames are rejected without touching the database. The check may sync the
+        # filter from the database, so it runs off the event loop.
+        if not await asyncio.to_thread(membership_index.might_exist, username=data['username']):
+            return jsonify({"error": "Invalid username or password"}), 401
+        
+        async with async_db.session() as session:
+            user = (await session.execute(
+                db.select(User).filter_by(username=data['username'])
+            )).scalars().first()
+        
+        if not user:
+            membership_index.record_false_positive()
+        
+        if not user or not await password_hasher.verify_async(user.password_hash, data['password']):
+            return jsonify({"error": "Invalid username or password"}), 401
+        
+        return AuthController._token_response(user)
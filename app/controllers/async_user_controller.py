@@ -0,0 +1,111 @@
+import asyncio
+from sqlalchemy.exc import IntegrityError
+from flask import request, jsonify
+from app.models.async_db import async_db
+from app.models.user import User
+from app.models.user_change import UserChange
+from app.controllers.user_controller import UserController
+from app.middlewares.auth_middleware import token_required
+from app.middlewares.rate_limit_middleware import rate_limited
+from app.utils.hashing import password_hasher
+from app.utils.errors import unique_violation_message
+from app.utils.http_cache import make_etag, is_not_modified, not_modified_response
+from app.utils.response_cache import response_cache, cached_response
+from app.utils.membership import membership_index
+from app.utils.post_commit import post_commit
+
+async def _cache(fn, *args):
+    # File and Redis cache backends do I/O, which must not stall the event loop
+    if response_cache.blocking:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+# Async counterparts of the UserController read/create handlers, backed by the async engine.
+# They share statements, serialization and caching with the sync handlers.
+class AsyncUserController:
+    @staticmethod
+    async def get_all_users():
+        try:
+            query = UserController._list_query()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        stream = request.args.get('stream')
+        if stream:
+            # Streaming stays on the sync generator path
+            return UserController.get_all_users()
+        
+        entry = await _cache(response_cache.get_list, query.key())
+        if entry is not None:
+            return cached_response(entry)
+        
+        async with async_db.session() as session:
+            last_modified, count = (await session.execute(UserController._list_meta_statement())).one()
+            etag = make_etag('users', last_modified, count, query.key())
+            if is_not_modified(etag, last_modified):
+                return not_modified_response(etag, last_modified)
+            
+            rows = (await session.execute(query.statement())).all()
+        
+        body = UserController._page_body(rows, query)
+        return cached_response(await _cache(response_cache.set_list, query.key(), body, etag, last_modified))
+    
+    @staticmethod
+    @token_required
+    async def get_user(current_user, user_id):
+        entry = await _cache(response_cache.get_user, user_id)
+        if entry is not None:
+            return cached_response(entry)
+        
+        async with async_db.session() as session:
+            if request.if_none_match or request.if_modified_since:
+                meta = (await session.execute(UserController._user_meta_statement(user_id))).first()
+                if not meta:
+                    return jsonify({"error": "User not found"}), 404
+                etag = make_etag('user', meta.id, meta.updated_at)
+                if is_not_modified(etag, meta.updated_at):
+                    return not_modified_response(etag, meta.updated_at)
+            
+            row = (await session.execute(UserController._user_statement(user_id))).first()
+        
+        if not row:
+            return jsonify({"error": "User not found"}), 404
+        return cached_response(await _cache(UserController._user_entry, user_id, row))
+    
+    @staticmethod
+    @rate_limited('signup')
+    async def create_user():
+        data = request.get_json()
+        
+        if not data or not all(k in data for k in ('username', 'email', 'password')):
+            return jsonify({"error": "Missing required fields"}), 400
+        
+        # Rejected here rather than by NOT NULL, whose error would be hard to tell apart
+        if not all(isinstance(data[k], str) and data[k] for k in ('username', 'email', 'password')):
+            return jsonify({"error": "Invalid field values"}), 400
+        
+        password_hash = await password_hasher.hash_async(data['password'])
+        
+        async with async_db.session() as session:
+            user = User(
+                username=data['username'],
+                email=data['email'],
+                password_hash=password_hash
+            )
+            try:
+                session.add(user)
+                await session.flush()
+                session.add(UserChange.for_user('create', user))
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                return jsonify({"error": unique_violation_message(e) or str(e.orig)}), 400
+            except Exception as e:
+                await session.rollback()
+                return jsonify({"error": str(e)}), 400
+        
+        # Both can wait on locks or cache I/O
+        await asyncio.to_thread(membership_index.add, user.username, user.email)
+        await asyncio.to_thread(post_commit.user_changed, 'create', user.id)
+        return jsonify(user.to_dict()), 201
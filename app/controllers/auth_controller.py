@@ -1,34 +1,120 @@
 from flask import request, jsonify, current_app
+from app.models import db
 from app.models.user import User
+from app.models.routing import replica_reads
+from app.middlewares.rate_limit_middleware import rate_limited
+from app.middlewares.auth_middleware import token_required
+from app.utils.membership import membership_index
+from app.utils.token_versions import token_versions
+from app.utils.user_cache import user_cache
+from app.utils.response_cache import response_cache
 import jwt
 import datetime
 
 class AuthController:
     @staticmethod
+    @rate_limited('login')
     def login():
         data = request.get_json()
         
         if not data or not all(k in data for k in ('username', 'password')):
             return jsonify({"error": "Missing username or password"}), 400
         
-        user = User.query.filter_by(username=data['username']).first()
+        # Unknown usernames are rejected without touching the database
+        if not membership_index.might_exist(username=data['username']):
+            return jsonify({"error": "Invalid username or password"}), 401
+        
+        with replica_reads():
+            user = User.query.filter_by(username=data['username']).first()
+        
+        # Fall back to the primary for accounts that haven't replicated yet
+        if not user:
+            user = User.query.filter_by(username=data['username']).first()
+        
+        if not user:
+            membership_index.record_false_positive()
         
         if not user or not user.check_password(data['password']):
             return jsonify({"error": "Invalid username or password"}), 401
         
-        # Generate JWT token
-        expiration = datetime.datetime.utcnow() + datetime.timedelta(
+        # A lagging replica may not have seen a recent revocation yet
+        if not token_versions.is_current(user.id, user.token_version):
+            db.session.refresh(user)
+        
+        return AuthController._token_response(user)
+    
+    @staticmethod
+    def refresh():
+        data = request.get_json(silent=True)
+        
+        if not data or 'refresh_token' not in data:
+            return jsonify({"error": "Missing refresh token"}), 400
+        
+        try:
+            claims = jwt.decode(data['refresh_token'], current_app.config['SECRET_KEY'], algorithms=["HS256"])
+        except jwt.ExpiredSignatureError:
+            return jsonify({"error": "Refresh token has expired"}), 401
+        except jwt.InvalidTokenError:
+            return jsonify({"error": "Invalid refresh token"}), 401
+        
+        if claims.get('type') != 'refresh':
+            return jsonify({"error": "Invalid refresh token"}), 401
+        
+        # The one place the current version is read from the primary rather than the table
+        user = db.session.get(User, claims['user_id'])
+        if not user or user.token_version != claims.get('ver'):
+            return jsonify({"error": "Refresh token has been revoked"}), 401
+        
+        token_versions.set(user.id, user.token_version)
+        return AuthController._token_response(user)
+    
+    @staticmethod
+    @token_required
+    def logout(current_user):
+        user = db.session.get(User, current_user.id)
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        
+        # Bumping the version invalidates every access and refresh token issued so far
+        user.token_version = User.token_version + 1
+        db.session.commit()
+        token_versions.set(user.id, user.token_version)
+        user_cache.invalidate(user.id)
+        response_cache.invalidate_user(user.id)
+        return jsonify({"message": "All tokens revoked"}), 200
+    
+    @staticmethod
+    def _encode(claims, expiration):
+        return jwt.encode(dict(claims, exp=expiration), current_app.config['SECRET_KEY'])
+    
+    @staticmethod
+    def _token_response(user):
+        now = datetime.datetime.utcnow()
+        access_expiration = now + datetime.timedelta(
+            minutes=current_app.config.get('JWT_ACCESS_EXPIRATION_MINUTES', 15)
+        )
+        refresh_expiration = now + datetime.timedelta(
             hours=current_app.config.get('JWT_EXPIRATION_HOURS', 24)
         )
         
-        token = jwt.encode({
+        # Access tokens carry everything authorization needs, so protected routes skip the user lookup
+        token = AuthController._encode({
+            'type': 'access',
             'user_id': user.id,
             'username': user.username,
-            'exp': expiration
-        }, current_app.config['SECRET_KEY'])
+            'role': user.role,
+            'ver': user.token_version
+        }, access_expiration)
+        refresh_token = AuthController._encode({
+            'type': 'refresh',
+            'user_id': user.id,
+            'ver': user.token_version
+        }, refresh_expiration)
         
         return jsonify({
             'token': token,
             'user': user.to_dict(),
-            'expires_at': expiration.isoformat()
+            'expires_at': access_expiration.isoformat(),
+            'refresh_token': refresh_token,
+            'refresh_expires_at': refresh_expiration.isoformat()
         }), 200
@@ -0,0 +1,9 @@
+from flask import current_app
+from app.middlewares.instrumentation import gather_metrics
+from app.utils.metrics import render_prometheus
+
+class MetricsController:
+    @staticmethod
+    def metrics():
+        body = render_prometheus(gather_metrics(current_app))
+        return current_app.response_class(body, mimetype='text/plain; version=0.0.4')
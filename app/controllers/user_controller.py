@@ -1,51 +1,251 @@
-from flask import request, jsonify
+from sqlalchemy.exc import IntegrityError
+from flask import request, jsonify, current_app, Response
 from app.models import db
-from app.models.user import User
-from werkzeug.security import generate_password_hash
+from app.models.user import User, user_row_to_dict
+from app.models.user_change import UserChange
+from app.models.routing import replica_read, replica_reads
 from app.middlewares.auth_middleware import token_required, admin_required
+from app.middlewares.rate_limit_middleware import rate_limited
+from app.utils.user_query import UserListQuery
+from app.utils.hashing import password_hasher, HashPoolSaturated
+from app.utils.user_import import import_users, parse_ndjson, summarize
+from app.utils.errors import unique_violation_message
+from app.utils.http_cache import make_etag, is_not_modified, not_modified_response
+from app.utils.response_cache import response_cache, cached_response
+from app.utils.membership import membership_index
+from app.utils.token_versions import token_versions
+from app.utils.post_commit import post_commit
+from app.utils.change_feed import stream_changes
+from app.utils.pagination import parse_limit
 
 class UserController:
     @staticmethod
+    def _list_query():
+        # Raises ValueError with a client-facing message for bad parameters
+        return UserListQuery.from_args(request.args, current_app.config)
+    
+    @staticmethod
+    def _list_meta_statement():
+        # Validators for the list come from a cheap aggregate over the table plus the page parameters
+        return db.select(db.func.max(User.updated_at), db.func.count(User.id))
+    
+    @staticmethod
+    def _page_body(rows, query):
+        next_cursor = None
+        if len(rows) > query.limit:
+            rows = rows[:query.limit]
+            next_cursor = query.cursor_for(rows[-1])
+        
+        return current_app.json.dumps({
+            'users': [query.serialize(row) for row in rows],
+            'next_cursor': next_cursor
+        })
+    
+    @staticmethod
+    @replica_read
     def get_all_users():
-        users = User.query.all()
-        return jsonify([user.to_dict() for user in users]), 200
+        try:
+            query = UserController._list_query()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        stream = request.args.get('stream')
+        if stream:
+            if stream not in ('ndjson', 'json'):
+                return jsonify({"error": "Unsupported stream format"}), 400
+            return UserController._stream_users(stream, query)
+        
+        entry = response_cache.get_list(query.key())
+        if entry is not None:
+            return cached_response(entry)
+        
+        last_modified, count = db.session.execute(UserController._list_meta_statement()).one()
+        etag = make_etag('users', last_modified, count, query.key())
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        
+        rows = db.session.execute(query.statement()).all()
+        body = UserController._page_body(rows, query)
+        return cached_response(response_cache.set_list(query.key(), body, etag, last_modified))
+    
+    @staticmethod
+    def _stream_users(fmt, query):
+        # Streams every matching row in the query's order, ignoring limit
+        statement = query.statement(paginate=False).execution_options(
+            yield_per=current_app.config['USERS_STREAM_BATCH_SIZE']
+        )
+        
+        app = current_app._get_current_object()
+        
+        def generate():
+            # The generator outlives the handler (and, for async views, its context),
+            # so it runs in its own app context and replica scope
+            with app.app_context(), replica_reads():
+                rows = db.session.execute(statement)
+                if fmt == 'ndjson':
+                    for row in rows:
+                        yield current_app.json.dumps(query.serialize(row)) + '\n'
+                    return
+                
+                # Chunked JSON array: emit the brackets and separators around each row
+                yield '['
+                separator = ''
+                for row in rows:
+                    yield separator + current_app.json.dumps(query.serialize(row))
+                    separator = ','
+                yield ']'
+        
+        mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+        return Response(generate(), mimetype=mimetype)
+    
+    @staticmethod
+    def _user_meta_statement(user_id):
+        return db.select(User.id, User.updated_at).where(User.id == user_id)
+    
+    @staticmethod
+    def _user_statement(user_id):
+        return db.select(*User.public_columns()).where(User.id == user_id)
+    
+    @staticmethod
+    def _user_entry(user_id, row):
+        etag = make_etag('user', row.id, row.updated_at)
+        body = current_app.json.dumps(user_row_to_dict(row))
+        return response_cache.set_user(user_id, body, etag, row.updated_at)
     
     @staticmethod
     @token_required
+    @replica_read
     def get_user(current_user, user_id):
-        user = User.query.get(user_id)
-        if not user:
+        entry = response_cache.get_user(user_id)
+        if entry is not None:
+            return cached_response(entry)
+        
+        # Conditional requests are answered from (id, updated_at) alone
+        if request.if_none_match or request.if_modified_since:
+            meta = db.session.execute(UserController._user_meta_statement(user_id)).first()
+            if not meta:
+                return jsonify({"error": "User not found"}), 404
+            etag = make_etag('user', meta.id, meta.updated_at)
+            if is_not_modified(etag, meta.updated_at):
+                return not_modified_response(etag, meta.updated_at)
+        
+        row = db.session.execute(UserController._user_statement(user_id)).first()
+        if not row:
             return jsonify({"error": "User not found"}), 404
-        return jsonify(user.to_dict()), 200
+        return cached_response(UserController._user_entry(user_id, row))
     
     @staticmethod
+    @token_required
+    @replica_read
+    def get_users_batch(current_user):
+        data = request.get_json(silent=True)
+        ids = data.get('ids') if isinstance(data, dict) else None
+        
+        if not isinstance(ids, list) or not ids:
+            return jsonify({"error": "Expected a non-empty list of ids"}), 400
+        
+        if not all(isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in ids):
+            return jsonify({"error": "Ids must be integers"}), 400
+        
+        # Duplicates are collapsed; the response keeps the order ids were first requested in
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > current_app.config['USERS_BATCH_MAX_IDS']:
+            return jsonify({"error": "Too many ids in one request"}), 413
+        
+        rows = db.session.execute(
+            db.select(*User.public_columns()).where(User.id.in_(ids))
+        ).all()
+        found = {row.id: row for row in rows}
+        
+        return current_app.response_class(current_app.json.dumps({
+            'users': [user_row_to_dict(found[user_id]) for user_id in ids if user_id in found],
+            'missing': [user_id for user_id in ids if user_id not in found]
+        }), mimetype='application/json')
+    
+    @staticmethod
+    @admin_required
+    @replica_read
+    def get_user_changes(current_user):
+        config = current_app.config
+        try:
+            # EventSource sends Last-Event-ID when it reconnects
+            since = int(request.headers.get('Last-Event-ID') or request.args.get('since', 0))
+            limit = parse_limit(request.args.get('limit'), config['CHANGE_FEED_PAGE_SIZE'], config['CHANGE_FEED_MAX_PAGE_SIZE'])
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid since or limit"}), 400
+        if since < 0:
+            return jsonify({"error": "Invalid since or limit"}), 400
+        
+        fmt = request.args.get('format')
+        if fmt is None:
+            best = request.accept_mimetypes.best_match(['application/x-ndjson', 'text/event-stream'])
+            fmt = 'sse' if best == 'text/event-stream' else 'ndjson'
+        if fmt not in ('ndjson', 'sse'):
+            return jsonify({"error": "Unsupported stream format"}), 400
+        
+        return stream_changes(fmt, since, limit)
+    
+    @staticmethod
+    @rate_limited('signup')
     def create_user():
         data = request.get_json()
         
         if not data or not all(k in data for k in ('username', 'email', 'password')):
             return jsonify({"error": "Missing required fields"}), 400
         
-        # Check if username or email already exists
-        if User.query.filter_by(username=data['username']).first():
-            return jsonify({"error": "Username already exists"}), 400
-        
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({"error": "Email already exists"}), 400
+        # Rejected here rather than by NOT NULL, whose error would be hard to tell apart
+        if not all(isinstance(data[k], str) and data[k] for k in ('username', 'email', 'password')):
+            return jsonify({"error": "Invalid field values"}), 400
         
         try:
             user = User(
                 username=data['username'],
                 email=data['email'],
-                password_hash=generate_password_hash(data['password'])
+                password_hash=password_hasher.hash(data['password'])
             )
             
+            # Uniqueness is enforced by the database constraints in a single INSERT
             db.session.add(user)
+            db.session.flush()
+            db.session.add(UserChange.for_user('create', user))
             db.session.commit()
+            membership_index.add(user.username, user.email)
+            post_commit.user_changed('create', user.id)
             return jsonify(user.to_dict()), 201
+        except HashPoolSaturated:
+            # Answered with 503 and Retry-After by the registered error handler
+            raise
+        except IntegrityError as e:
+            db.session.rollback()
+            return jsonify({"error": unique_violation_message(e) or str(e.orig)}), 400
         except Exception as e:
             db.session.rollback()
             return jsonify({"error": str(e)}), 400
     
+    @staticmethod
+    @admin_required
+    def bulk_create_users(current_user):
+        if request.mimetype == 'application/x-ndjson':
+            rows = list(parse_ndjson(request.get_data(as_text=True).splitlines()))
+        else:
+            rows = request.get_json(silent=True)
+            if not isinstance(rows, list):
+                return jsonify({"error": "Expected a JSON array of users"}), 400
+        
+        if not rows:
+            return jsonify({"error": "No data provided"}), 400
+        
+        if len(rows) > current_app.config['USER_IMPORT_MAX_ROWS']:
+            return jsonify({"error": "Too many users in one request"}), 413
+        
+        with password_hasher.bulk_import():
+            results = import_users(
+                rows,
+                batch_size=current_app.config['USER_IMPORT_BATCH_SIZE'],
+                workers=current_app.config['USER_IMPORT_HASH_WORKERS']
+            )
+        return jsonify(summarize(results)), 200
+    
     @staticmethod
     @token_required
     def update_user(current_user, user_id):
@@ -58,26 +258,50 @@ class UserController:
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
+        if not all(isinstance(data[k], str) and data[k] for k in ('username', 'email', 'password') if k in data):
+            return jsonify({"error": "Invalid field values"}), 400
+        
         user = User.query.get(user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
         
         try:
+            changes = {}
             if 'username' in data and data['username'] != user.username:
-                if User.query.filter_by(username=data['username']).first():
-                    return jsonify({"error": "Username already exists"}), 400
-                user.username = data['username']
+                changes['username'] = data['username']
             
             if 'email' in data and data['email'] != user.email:
-                if User.query.filter_by(email=data['email']).first():
-                    return jsonify({"error": "Email already exists"}), 400
-                user.email = data['email']
+                changes['email'] = data['email']
             
+            # A password is always rehashed: telling a resent one apart would cost the same KDF
             if 'password' in data:
-                user.password_hash = generate_password_hash(data['password'])
+                changes['password_hash'] = password_hasher.hash(data['password'])
+            
+            # No-op updates skip the commit, so updated_at, ETags and caches stay as they are
+            if not changes:
+                return jsonify(user.to_dict()), 200
             
+            for field, value in changes.items():
+                setattr(user, field, value)
+            
+            db.session.flush()
+            db.session.add(UserChange.for_user('update', user))
             db.session.commit()
+            replaced_keys = len(changes.keys() & {'username', 'email'})
+            if replaced_keys:
+                membership_index.add(user.username, user.email)
+                membership_index.mark_stale(replaced_keys)
+            post_commit.user_changed(
+                'update', user_id, actor_id=current_user.id,
+                fields=sorted('password' if field == 'password_hash' else field for field in changes)
+            )
             return jsonify(user.to_dict()), 200
+        except HashPoolSaturated:
+            # Answered with 503 and Retry-After by the registered error handler
+            raise
+        except IntegrityError as e:
+            db.session.rollback()
+            return jsonify({"error": unique_violation_message(e) or str(e.orig)}), 400
         except Exception as e:
             db.session.rollback()
             return jsonify({"error": str(e)}), 400
@@ -94,8 +318,12 @@ class UserController:
             return jsonify({"error": "User not found"}), 404
         
         try:
+            db.session.add(UserChange.for_user('delete', user))
             db.session.delete(user)
             db.session.commit()
+            token_versions.revoke_deleted(user_id)
+            membership_index.mark_stale(2)
+            post_commit.user_changed('delete', user_id, actor_id=current_user.id)
             return jsonify({"message": "User deleted successfully"}), 200
         except Exception as e:
             db.session.rollback()
@@ -1,72 +1,113 @@
+import asyncio
+import inspect
 from functools import wraps
-from flask import request, jsonify, current_app
+from flask import request, jsonify
 import jwt
-from app.models.user import User
+from app.models import db
+from app.models.user import User, UserSnapshot
+from app.models.routing import replica_reads, set_request_identity
+from app.utils.user_cache import user_cache
+from app.utils.token_cache import token_cache
+from app.utils.token_versions import token_versions
+from app.utils.metrics import registry
 
-def token_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = None
+def load_current_user(user_id):
+    set_request_identity(user_id)
+    
+    # Serve the authenticated user from the per-process cache when possible
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+    
+    # Authorization only needs the id and role
+    statement = db.select(User.id, User.role).where(User.id == user_id)
+    with replica_reads():
+        row = db.session.execute(statement).first()
+    if not row:
+        row = db.session.execute(statement).first()
+    if not row:
+        return None
+    
+    snapshot = UserSnapshot.from_row(row)
+    user_cache.set(snapshot)
+    return snapshot
+
+def authenticate(admin=False):
+    # Returns (current_user, None) on success or (None, error response) on failure
+    token = None
+    
+    # Check if token is in headers
+    if 'Authorization' in request.headers:
+        auth_header = request.headers['Authorization']
+        if auth_header.startswith('Bearer '):
+            token = auth_header.split(' ')[1]
+    
+    if not token:
+        registry.inc('auth_outcomes_total', outcome='missing')
+        return None, (jsonify({'error': 'Token is missing'}), 401)
+    
+    try:
+        # Decode the token
+        data = token_cache.decode(token)
+        if data.get('type') == 'refresh':
+            raise jwt.InvalidTokenError('Refresh tokens are only accepted by /api/auth/refresh')
         
-        # Check if token is in headers
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
+        if 'ver' in data:
+            # Authorize from the claims; revocation is an in-memory version comparison
+            if not token_versions.is_current(data['user_id'], data['ver']):
+                registry.inc('auth_outcomes_total', outcome='revoked')
+                return None, (jsonify({'error': 'Token has been revoked'}), 401)
+            set_request_identity(data['user_id'])
+            current_user = UserSnapshot(data['user_id'], data['role'])
+        else:
+            # Tokens issued before role/version claims still authorize through a user lookup
+            current_user = load_current_user(data['user_id'])
         
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
+        if not current_user:
+            registry.inc('auth_outcomes_total', outcome='user_not_found')
+            return None, (jsonify({'error': 'Invalid token - user not found'}), 401)
         
-        try:
-            # Decode the token
-            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = User.query.get(data['user_id'])
+        # Check if user is admin
+        if admin and not current_user.is_admin():
+            registry.inc('auth_outcomes_total', outcome='forbidden')
+            return None, (jsonify({'error': 'Admin privileges required'}), 403)
             
-            if not current_user:
-                return jsonify({'error': 'Invalid token - user not found'}), 401
-                
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token has expired'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'error': 'Invalid token'}), 401
-        
-        # Pass the current user to the route function
-        return f(current_user, *args, **kwargs)
+    except jwt.ExpiredSignatureError:
+        registry.inc('auth_outcomes_total', outcome='expired')
+        return None, (jsonify({'error': 'Token has expired'}), 401)
+    except jwt.InvalidTokenError:
+        registry.inc('auth_outcomes_total', outcome='invalid')
+        return None, (jsonify({'error': 'Invalid token'}), 401)
     
-    return decorated
+    registry.inc('auth_outcomes_total', outcome='success')
+    return current_user, None
 
-def admin_required(f):
+def _protect(f, admin):
+    # Async views get an async wrapper so Flask still awaits them
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def decorated_async(*args, **kwargs):
+            # Revocation syncs and user lookups query the database, so they run off the event
+            # loop; asyncio.to_thread carries Flask's contexts with it
+            current_user, error = await asyncio.to_thread(authenticate, admin)
+            if error:
+                return error
+            return await f(current_user, *args, **kwargs)
+        return decorated_async
+    
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        
-        # Check if token is in headers
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-        
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
-        
-        try:
-            # Decode the token
-            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = User.query.get(data['user_id'])
-            
-            if not current_user:
-                return jsonify({'error': 'Invalid token - user not found'}), 401
-            
-            # Check if user is admin
-            if not current_user.is_admin():
-                return jsonify({'error': 'Admin privileges required'}), 403
-                
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token has expired'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'error': 'Invalid token'}), 401
+        current_user, error = authenticate(admin)
+        if error:
+            return error
         
         # Pass the current user to the route function
         return f(current_user, *args, **kwargs)
     
     return decorated
+
+def token_required(f):
+    return _protect(f, admin=False)
+
+def admin_required(f):
+    return _protect(f, admin=True)
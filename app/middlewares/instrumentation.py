@@ -0,0 +1,165 @@
+import os
+import time
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from app.models import db
+from app.utils.metrics import registry, request_timings, COUNT_BUCKETS, MultiProcessStore, merge_samples
+from app.utils.user_cache import user_cache
+from app.utils.token_cache import token_cache
+from app.utils.response_cache import response_cache
+from app.utils.membership import membership_index
+from app.utils.token_versions import token_versions
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_request_context() and '_sql_count' in g:
+        g._sql_count += 1
+        g._sql_time += elapsed
+
+
+def _handle_error(context):
+    stack = context.connection.info.get('query_start') if context.connection is not None else None
+    if stack:
+        stack.pop()
+
+
+def _before_request():
+    g._request_start = time.perf_counter()
+    g._sql_count = 0
+    g._sql_time = 0.0
+
+
+def _after_request(app):
+    def after_request(response):
+        if '_request_start' not in g:
+            return response
+        
+        elapsed = time.perf_counter() - g._request_start
+        endpoint = request.endpoint or 'unmatched'
+        registry.inc('http_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+        registry.observe('http_request_duration_seconds', elapsed, endpoint=endpoint, method=request.method)
+        registry.observe('sql_queries_per_request', g._sql_count, buckets=COUNT_BUCKETS, endpoint=endpoint)
+        registry.observe('sql_time_per_request_seconds', g._sql_time, endpoint=endpoint)
+        
+        if app.config['SERVER_TIMING_HEADER']:
+            parts = [f'app;dur={elapsed * 1000:.2f}', f'db;dur={g._sql_time * 1000:.2f};desc="{g._sql_count} queries"']
+            for name, seconds in (request_timings() or {}).items():
+                parts.append(f'{name};dur={seconds * 1000:.2f}')
+            response.headers['Server-Timing'] = ', '.join(parts)
+        
+        if app.config['SLOW_REQUEST_LOG'] and (
+            elapsed * 1000 >= app.config['SLOW_REQUEST_MS']
+            or g._sql_count >= app.config['SLOW_REQUEST_QUERY_COUNT']
+        ):
+            app.logger.warning(
+                'Slow request %s %s: %.1fms, %d queries (%.1fms in SQL)',
+                request.method, request.full_path.rstrip('?'), elapsed * 1000, g._sql_count, g._sql_time * 1000
+            )
+        
+        flush_metrics(app)
+        return response
+    return after_request
+
+
+def _gauge(name, value, **labels):
+    return {'name': name, 'kind': 'gauge', 'labels': labels, 'value': value}
+
+
+def _counter(name, value, **labels):
+    return {'name': name, 'kind': 'counter', 'labels': labels, 'value': value}
+
+
+def collect_runtime_samples(app):
+    # Point-in-time values read at flush/scrape time rather than recorded per request
+    pid = os.getpid()
+    samples = []
+    for key, engine in db.engines.items():
+        pool = engine.pool
+        bind = key or 'primary'
+        if hasattr(pool, 'checkedout'):
+            samples.append(_gauge('db_pool_checked_out', pool.checkedout(), bind=bind, pid=pid))
+        if hasattr(pool, 'overflow'):
+            samples.append(_gauge('db_pool_overflow', pool.overflow(), bind=bind, pid=pid))
+        if hasattr(pool, 'size'):
+            samples.append(_gauge('db_pool_size', pool.size(), bind=bind, pid=pid))
+    
+    caches = {'user': user_cache, 'token': token_cache, 'response': response_cache}
+    for name, cache in caches.items():
+        stats = cache.stats()
+        for field in ('hits', 'misses', 'evictions'):
+            if field in stats:
+                samples.append(_counter(f'cache_{field}_total', stats[field], cache=name))
+        if 'size' in stats:
+            samples.append(_gauge('cache_entries', stats['size'], cache=name, pid=pid))
+    
+    stats = membership_index.stats()
+    for field in ('checks', 'syncs', 'definite_misses', 'false_positives'):
+        samples.append(_counter(f'membership_index_{field}_total', stats[field]))
+    if 'bytes' in stats:
+        samples.append(_gauge('membership_index_bytes', stats['bytes'], pid=pid))
+        samples.append(_gauge('membership_index_keys', stats['size'], pid=pid))
+        samples.append(_gauge('membership_index_stale_keys', stats['stale'], pid=pid))
+        samples.append(_gauge('membership_index_estimated_error_rate', stats['estimated_error_rate'], pid=pid))
+    samples.append(_gauge('token_versions_entries', token_versions.stats()['size'], pid=pid))
+    return samples
+
+
+def _hit_ratios(samples):
+    totals = {}
+    for sample in samples:
+        if sample['name'] in ('cache_hits_total', 'cache_misses_total'):
+            hits, misses = totals.get(sample['labels']['cache'], (0, 0))
+            if sample['name'] == 'cache_hits_total':
+                hits += sample['value']
+            else:
+                misses += sample['value']
+            totals[sample['labels']['cache']] = (hits, misses)
+    return [
+        _gauge('cache_hit_ratio', hits / (hits + misses) if hits + misses else 0.0, cache=cache)
+        for cache, (hits, misses) in totals.items()
+    ]
+
+
+def flush_metrics(app, force=False):
+    store = app.extensions.get('metrics_store')
+    if store is None:
+        return
+    now = time.monotonic()
+    if not force and now - app.extensions['metrics_last_flush'] < app.config['METRICS_FLUSH_INTERVAL']:
+        return
+    app.extensions['metrics_last_flush'] = now
+    store.write(os.getpid(), registry.samples() + collect_runtime_samples(app))
+
+
+def gather_metrics(app):
+    store = app.extensions.get('metrics_store')
+    if store is None:
+        samples = registry.samples() + collect_runtime_samples(app)
+    else:
+        # Under gunicorn every worker's latest flush is merged; ours is refreshed first
+        flush_metrics(app, force=True)
+        samples = store.read_all()
+    samples = merge_samples(samples)
+    return samples + _hit_ratios(samples)
+
+
+def init_instrumentation(app, engines):
+    directory = app.config.get('METRICS_MULTIPROC_DIR')
+    app.extensions['metrics_store'] = MultiProcessStore(directory) if directory else None
+    app.extensions['metrics_last_flush'] = 0.0
+    
+    if not app.config['INSTRUMENTATION_ENABLED']:
+        return
+    
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+    
+    app.before_request(_before_request)
+    app.after_request(_after_request(app))
@@ -0,0 +1,55 @@
+import asyncio
+import inspect
+import math
+from functools import wraps
+from flask import request, jsonify, current_app
+from app.utils.rate_limit import rate_limiter, parse_rate
+from app.utils.metrics import registry
+
+def check_rate_limit(name):
+    # Returns a 429 response when the caller's IP or the targeted username is out of tokens
+    if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+        return None
+    
+    data = request.get_json(silent=True)
+    username = data.get('username') if isinstance(data, dict) else None
+    # remote_addr is the real client only when TRUSTED_PROXY_HOPS matches the deployment
+    scopes = [('ip', request.remote_addr)]
+    if isinstance(username, str):
+        scopes.append(('username', username.lower()))
+    
+    for scope, value in scopes:
+        rate = parse_rate(current_app.config.get(f'{name.upper()}_RATE_LIMIT_PER_{scope.upper()}'))
+        if rate is None or value is None:
+            continue
+        allowed, retry_after = rate_limiter.consume(f'{name}:{scope}:{value}', rate)
+        if not allowed:
+            registry.inc('rate_limited_total', limit=name, scope=scope)
+            response = jsonify({"error": "Too many requests"})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+            return response
+    return None
+
+def rate_limited(name):
+    def decorator(f):
+        if inspect.iscoroutinefunction(f):
+            @wraps(f)
+            async def decorated_async(*args, **kwargs):
+                if rate_limiter.blocking:
+                    throttled = await asyncio.to_thread(check_rate_limit, name)
+                else:
+                    throttled = check_rate_limit(name)
+                if throttled is not None:
+                    return throttled
+                return await f(*args, **kwargs)
+            return decorated_async
+        
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            throttled = check_rate_limit(name)
+            if throttled is not None:
+                return throttled
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
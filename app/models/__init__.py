@@ -1,5 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from app.models.routing import RoutingSession, mark_written, on_commit, on_rollback
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+event.listen(RoutingSession, 'after_flush', lambda session, context: mark_written(session))
+event.listen(RoutingSession, 'after_commit', on_commit)
+event.listen(RoutingSession, 'after_soft_rollback', lambda session, transaction: on_rollback(session))
 
 from app.models.user import User
+from app.models.user_change import UserChange
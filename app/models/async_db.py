@@ -0,0 +1,50 @@
+from flask import current_app
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql'
+}
+
+
+def async_url(uri):
+    url = make_url(uri)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+# Async engine used by the async handlers when ASYNC_HANDLERS is enabled
+class AsyncDatabase:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('ASYNC_HANDLERS'):
+            return
+        
+        # Only async deployments pay for importing the asyncio extension
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        
+        options = {
+            key: value for key, value in app.config['SQLALCHEMY_ENGINE_OPTIONS'].items()
+            if key != 'poolclass'
+        }
+        if not app.config.get('ASYNC_DB_POOLED'):
+            # Outside an ASGI server Flask runs each async view on a fresh event loop,
+            # and pooled async connections can't be shared between loops
+            options = {'connect_args': options.get('connect_args', {}), 'poolclass': NullPool}
+        
+        engine = create_async_engine(async_url(app.config['SQLALCHEMY_DATABASE_URI']), **options)
+        app.extensions['async_db'] = async_sessionmaker(engine, expire_on_commit=False)
+
+    def sync_engines(self, app):
+        sessionmaker = app.extensions.get('async_db')
+        return [sessionmaker.kw['bind'].sync_engine] if sessionmaker else []
+
+    def session(self):
+        return current_app.extensions['async_db']()
+
+
+async_db = AsyncDatabase()
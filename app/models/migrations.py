@@ -0,0 +1,14 @@
+import os
+from app.models import db
+
+
+def init_migrations(app):
+    # Imported here: Flask-Migrate pulls in Alembic and Mako (~90ms), which only the
+    # `flask db` commands and init_db.py need
+    from flask_migrate import Migrate
+    
+    # Batch mode lets ALTERs run on SQLite, which can't alter constraints in place
+    Migrate(
+        app, db, render_as_batch=True,
+        directory=os.path.join(os.path.dirname(app.root_path), 'migrations')
+    )
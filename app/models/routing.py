@@ -0,0 +1,133 @@
+import random
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, current_app, has_app_context, request
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from app.utils.cache import TTLCache
+
+REPLICA_BIND_PREFIX = 'replica_'
+PIN_COOKIE = 'db_primary_pin'
+
+
+# Session that sends reads for default-bind models to a replica while a replica scope is active.
+# Flushes, sessions holding pending writes and primary-pinned requests always use the primary.
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or self._flushing or self.info.get('wrote'):
+            return engine
+        if clause is not None and getattr(clause, 'is_dml', False):
+            return engine
+        
+        engines = self._db.engines
+        if engine is not engines.get(None) or not _replica_active():
+            return engine
+        
+        # One replica per request, so all of its reads see the same replication lag
+        replica = g.get('_db_replica')
+        if replica is None:
+            replicas = [e for key, e in engines.items() if key and key.startswith(REPLICA_BIND_PREFIX)]
+            if not replicas:
+                return engine
+            replica = g._db_replica = random.choice(replicas)
+        return replica
+
+
+def _replica_active():
+    return has_app_context() and g.get('_db_replica_depth', 0) > 0 and not g.get('_db_primary_pinned')
+
+
+def primary_pinned():
+    return has_app_context() and bool(g.get('_db_primary_pinned'))
+
+
+def read_from_replica():
+    # Whether this request has read from a replica so far
+    return has_app_context() and g.get('_db_replica') is not None
+
+
+@contextmanager
+def replica_reads():
+    g._db_replica_depth = g.get('_db_replica_depth', 0) + 1
+    try:
+        yield
+    finally:
+        g._db_replica_depth -= 1
+
+
+def replica_read(f):
+    # Serve a read-only handler from a replica unless the caller recently wrote
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        with replica_reads():
+            return f(*args, **kwargs)
+    return decorated
+
+
+def _pins():
+    return current_app.extensions['primary_pins']
+
+
+def init_routing(app):
+    app.extensions['primary_pins'] = TTLCache(
+        maxsize=app.config.get('REPLICA_PIN_CACHE_SIZE', 10000),
+        ttl=app.config.get('REPLICA_READ_YOUR_WRITES_SECONDS', 5)
+    )
+    if app.config.get('DATABASE_REPLICA_URLS'):
+        app.before_request(_read_pin_cookie)
+        app.after_request(_set_pin_cookie)
+
+
+def _pin_serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt='db-primary-pin')
+
+
+def _read_pin_cookie():
+    # The pin travels with the client, so its next requests stay on the primary whichever
+    # worker serves them
+    token = request.cookies.get(PIN_COOKIE)
+    if token is None:
+        return
+    try:
+        _pin_serializer().loads(token, max_age=current_app.config['REPLICA_READ_YOUR_WRITES_SECONDS'])
+    except BadSignature:
+        return
+    g._db_primary_pinned = True
+
+
+def _set_pin_cookie(response):
+    if g.get('_db_wrote'):
+        response.set_cookie(
+            PIN_COOKIE, _pin_serializer().dumps(True),
+            max_age=current_app.config['REPLICA_READ_YOUR_WRITES_SECONDS'],
+            httponly=True, samesite='Lax', secure=request.is_secure
+        )
+    return response
+
+
+def set_request_identity(user_id):
+    # Called by the auth middleware so writes can pin the caller to the primary
+    g._db_identity = user_id
+    if _pins().get(user_id):
+        g._db_primary_pinned = True
+
+
+def mark_written(session):
+    session.info['wrote'] = True
+
+
+def on_commit(session):
+    if not session.info.pop('wrote', False) or not has_app_context():
+        return
+    
+    # Read-your-writes: the rest of this request and the writer's next few seconds go to the primary
+    g._db_primary_pinned = True
+    g._db_wrote = True
+    identity = g.get('_db_identity')
+    if identity is not None:
+        _pins().set(identity, True)
+
+
+def on_rollback(session):
+    session.info.pop('wrote', None)
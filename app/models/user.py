@@ -1,6 +1,6 @@
 from datetime import datetime
 from app.models import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.hashing import password_hasher
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -10,12 +10,27 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     role = db.Column(db.String(20), default='user')  # user, admin
     password_hash = db.Column(db.String(128), nullable=False)
+    # Bumped to revoke every token issued to the user
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    # Access paths: case-insensitive username/email lookups, role-filtered listing in id order,
+    # and created_at-sorted keyset pagination (see `flask users explain`)
+    __table_args__ = (
+        db.Index('ix_users_username_lower', db.func.lower(username)),
+        db.Index('ix_users_email_lower', db.func.lower(email)),
+        db.Index('ix_users_role_id', role, id),
+        db.Index('ix_users_created_at_id', created_at, id),
+    )
     
     def __repr__(self):
         return f'<User {self.username}>'
     
+    @classmethod
+    def public_columns(cls):
+        return (cls.id, cls.username, cls.role, cls.email, cls.created_at, cls.updated_at)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -27,4 +42,42 @@ class User(db.Model):
         }
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def is_admin(self):
+        return self.role == 'admin'
+
+
+def user_row_to_dict(row):
+    # Serializes a row selected with User.public_columns() without hydrating a User
+    id, username, role, email, created_at, updated_at = row
+    return {
+        'id': id,
+        'username': username,
+        'role': role,
+        'email': email,
+        'created_at': created_at.isoformat(),
+        'updated_at': updated_at.isoformat()
+    }
+
+
+class UserSnapshot:
+    # Compact, read-only view of a user carried through the auth middleware
+    __slots__ = ('id', 'role')
+    
+    def __init__(self, id, role):
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'role', role)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError('UserSnapshot is read-only')
+    
+    def __repr__(self):
+        return f'<UserSnapshot {self.id}>'
+    
+    @classmethod
+    def from_row(cls, row):
+        return cls(row.id, row.role)
+    
+    def is_admin(self):
+        return self.role == 'admin'
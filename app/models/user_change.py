@@ -0,0 +1,37 @@
+from datetime import datetime
+from app.models import db
+
+
+class UserChange(db.Model):
+    __tablename__ = 'user_changes'
+    
+    # Append-only log of user mutations; id doubles as the feed's sequence number
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(10), nullable=False)  # create, update, delete
+    # Public representation after the change; null for deletes
+    data = db.Column(db.JSON)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    # Never reuse sequence numbers on SQLite, even after the newest entries are pruned
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    def __repr__(self):
+        return f'<UserChange {self.id} {self.action} {self.user_id}>'
+    
+    @classmethod
+    def for_user(cls, action, user):
+        # Call after the user's row is flushed so id and timestamps are populated
+        data = None if action == 'delete' else user.to_dict()
+        return cls(user_id=user.id, action=action, data=data)
+
+
+def change_row_to_dict(row):
+    id, user_id, action, data, changed_at = row
+    return {
+        'seq': id,
+        'action': action,
+        'user_id': user_id,
+        'user': data,
+        'changed_at': changed_at.isoformat()
+    }
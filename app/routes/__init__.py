@@ -1,6 +1,9 @@
 from app.routes.user_routes import register_user_routes
 from app.routes.auth_routes import register_auth_routes
+from app.routes.metrics_routes import register_metrics_routes
 
 def register_routes(app):
     register_user_routes(app)
     register_auth_routes(app)
+    if app.config.get('METRICS_ENABLED', True):
+        register_metrics_routes(app)
@@ -1,5 +1,17 @@
-from app.controllers.auth_controller import AuthController
+from app.routes.lazy_view import LazyView
+
+AUTH = 'app.controllers.auth_controller:AuthController'
 
 def register_auth_routes(app):
+    login = LazyView(f'{AUTH}.login')
+    if app.config.get('ASYNC_HANDLERS'):
+        login = LazyView('app.controllers.async_auth_controller:AsyncAuthController.login')
+    
     # Login route
-    app.add_url_rule('/api/auth/login', 'login', AuthController.login, methods=['POST'])
+    app.add_url_rule('/api/auth/login', 'login', login, methods=['POST'])
+    
+    # Exchange a refresh token for a new access/refresh pair
+    app.add_url_rule('/api/auth/refresh', 'refresh_token', LazyView(f'{AUTH}.refresh'), methods=['POST'])
+    
+    # Revoke every token issued to the current user (protected)
+    app.add_url_rule('/api/auth/logout', 'logout', LazyView(f'{AUTH}.logout'), methods=['POST'])
@@ -0,0 +1,32 @@
+from functools import cached_property
+from importlib import import_module
+from flask import current_app
+
+
+# View that imports its controller on first request, so building the app doesn't import
+# every controller and its dependencies. `resolve()` loads it eagerly (preload mode).
+class LazyView:
+    def __init__(self, import_name):
+        self.import_name = import_name
+        self.__name__ = import_name.rsplit('.', 1)[-1]
+
+    @cached_property
+    def view(self):
+        module_name, attribute_path = self.import_name.split(':')
+        view = import_module(module_name)
+        for attribute in attribute_path.split('.'):
+            view = getattr(view, attribute)
+        return view
+
+    def resolve(self):
+        return self.view
+
+    def __call__(self, *args, **kwargs):
+        # ensure_sync keeps async handlers working behind the synchronous wrapper
+        return current_app.ensure_sync(self.view)(*args, **kwargs)
+
+
+def resolve_lazy_views(app):
+    for view in app.view_functions.values():
+        if isinstance(view, LazyView):
+            view.resolve()
@@ -0,0 +1,5 @@
+from app.routes.lazy_view import LazyView
+
+def register_metrics_routes(app):
+    # Prometheus scrape endpoint
+    app.add_url_rule('/metrics', 'metrics', LazyView('app.controllers.metrics_controller:MetricsController.metrics'), methods=['GET'])
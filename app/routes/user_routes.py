@@ -1,17 +1,44 @@
-from app.controllers.user_controller import UserController
+from app.routes.lazy_view import LazyView
+
+USERS = 'app.controllers.user_controller:UserController'
+ASYNC_USERS = 'app.controllers.async_user_controller:AsyncUserController'
 
 def register_user_routes(app):
+    if app.config.get('ASYNC_HANDLERS'):
+        register_async_user_routes(app)
+        return
+    
     # Get all users (protected)
-    app.add_url_rule('/api/users', 'get_users', UserController.get_all_users, methods=['GET'])
+    app.add_url_rule('/api/users', 'get_users', LazyView(f'{USERS}.get_all_users'), methods=['GET'])
     
     # Get a specific user (protected)
-    app.add_url_rule('/api/users/<int:user_id>', 'get_user', UserController.get_user, methods=['GET'])
+    app.add_url_rule('/api/users/<int:user_id>', 'get_user', LazyView(f'{USERS}.get_user'), methods=['GET'])
     
     # Create a new user (public)
-    app.add_url_rule('/api/create', 'create_user', UserController.create_user, methods=['POST'])
+    app.add_url_rule('/api/create', 'create_user', LazyView(f'{USERS}.create_user'), methods=['POST'])
+    
+    # Fetch many users by id in one request (protected)
+    app.add_url_rule('/api/users/batch', 'get_users_batch', LazyView(f'{USERS}.get_users_batch'), methods=['POST'])
+    
+    # Stream user changes after a sequence number as NDJSON or server-sent events (admin)
+    app.add_url_rule('/api/users/changes', 'get_user_changes', LazyView(f'{USERS}.get_user_changes'), methods=['GET'])
+    
+    # Bulk create users from a JSON array or NDJSON body (admin)
+    app.add_url_rule('/api/users/bulk', 'bulk_create_users', LazyView(f'{USERS}.bulk_create_users'), methods=['POST'])
     
     # Update a user (protected)
-    app.add_url_rule('/api/users/<int:user_id>', 'update_user', UserController.update_user, methods=['PUT'])
+    app.add_url_rule('/api/users/<int:user_id>', 'update_user', LazyView(f'{USERS}.update_user'), methods=['PUT'])
     
     # Delete a user (protected)
-    app.add_url_rule('/api/users/<int:user_id>', 'delete_user', UserController.delete_user, methods=['DELETE'])
+    app.add_url_rule('/api/users/<int:user_id>', 'delete_user', LazyView(f'{USERS}.delete_user'), methods=['DELETE'])
+
+def register_async_user_routes(app):
+    # Reads and signup use the async handlers; the remaining writes stay sync
+    app.add_url_rule('/api/users', 'get_users', LazyView(f'{ASYNC_USERS}.get_all_users'), methods=['GET'])
+    app.add_url_rule('/api/users/<int:user_id>', 'get_user', LazyView(f'{ASYNC_USERS}.get_user'), methods=['GET'])
+    app.add_url_rule('/api/create', 'create_user', LazyView(f'{ASYNC_USERS}.create_user'), methods=['POST'])
+    app.add_url_rule('/api/users/batch', 'get_users_batch', LazyView(f'{USERS}.get_users_batch'), methods=['POST'])
+    app.add_url_rule('/api/users/changes', 'get_user_changes', LazyView(f'{USERS}.get_user_changes'), methods=['GET'])
+    app.add_url_rule('/api/users/bulk', 'bulk_create_users', LazyView(f'{USERS}.bulk_create_users'), methods=['POST'])
+    app.add_url_rule('/api/users/<int:user_id>', 'update_user', LazyView(f'{USERS}.update_user'), methods=['PUT'])
+    app.add_url_rule('/api/users/<int:user_id>', 'delete_user', LazyView(f'{USERS}.delete_user'), methods=['DELETE'])
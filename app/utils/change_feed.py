@@ -0,0 +1,79 @@
+import datetime
+import time
+from flask import current_app, Response
+from app.models import db
+from app.models.routing import replica_reads
+from app.models.user_change import UserChange, change_row_to_dict
+
+
+def read_changes(since, limit):
+    # Entries after `since` in sequence order. Sequence numbers are assigned before commit,
+    # so a gap may be a transaction still in flight; nothing past a recent gap is returned.
+    settle = datetime.timedelta(seconds=current_app.config['CHANGE_FEED_SETTLE_SECONDS'])
+    cutoff = datetime.datetime.utcnow() - settle
+    rows = db.session.execute(
+        db.select(UserChange.id, UserChange.user_id, UserChange.action, UserChange.data, UserChange.changed_at)
+        .where(UserChange.id > since)
+        .order_by(UserChange.id)
+        .limit(limit)
+    ).all()
+    
+    changes = []
+    expected = since + 1
+    for row in rows:
+        if row.id != expected and row.changed_at > cutoff:
+            break
+        changes.append(row)
+        expected = row.id + 1
+    return changes
+
+
+def _sse_events(since, limit):
+    config = current_app.config
+    deadline = time.monotonic() + config['CHANGE_FEED_SSE_TIMEOUT']
+    yield f"retry: {int(config['CHANGE_FEED_POLL_INTERVAL'] * 1000)}\n\n"
+    while True:
+        changes = read_changes(since, limit)
+        # Hand the connection back to the pool while the client consumes or we wait
+        db.session.close()
+        for row in changes:
+            yield f'id: {row.id}\nevent: {row.action}\ndata: {current_app.json.dumps(change_row_to_dict(row))}\n\n'
+            since = row.id
+        
+        if len(changes) == limit:
+            continue
+        if time.monotonic() >= deadline:
+            return
+        if not changes:
+            # Keeps proxies from timing out the connection and detects departed clients
+            yield ': keepalive\n\n'
+        time.sleep(config['CHANGE_FEED_POLL_INTERVAL'])
+
+
+def stream_changes(fmt, since, limit):
+    # NDJSON returns one page. SSE sends everything available, follows the log for up to
+    # CHANGE_FEED_SSE_TIMEOUT (0 by default: a short poll), and the client resumes from the
+    # last event id
+    app = current_app._get_current_object()
+    
+    def generate():
+        with app.app_context(), replica_reads():
+            if fmt == 'sse':
+                yield from _sse_events(since, limit)
+                return
+            for row in read_changes(since, limit):
+                yield current_app.json.dumps(change_row_to_dict(row)) + '\n'
+    
+    if fmt == 'sse':
+        response = Response(generate(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    return Response(generate(), mimetype='application/x-ndjson')
+
+
+def prune_changes(older_than_days):
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=older_than_days)
+    result = db.session.execute(db.delete(UserChange).where(UserChange.changed_at < cutoff))
+    db.session.commit()
+    return result.rowcount
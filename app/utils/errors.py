@@ -0,0 +1,41 @@
+import re
+
+UNIQUE_FIELD_MESSAGES = {
+    'username': "Username already exists",
+    'email': "Email already exists"
+}
+
+# The part of each backend's unique-violation message that names the constraint or column,
+# never the duplicated value: SQLite "UNIQUE constraint failed: users.email", PostgreSQL
+# 'violates unique constraint "users_email_key"', MySQL "Duplicate entry ... for key 'users.email'"
+UNIQUE_VIOLATION_PATTERNS = (
+    re.compile(r'UNIQUE constraint failed: ([\w., ]+)'),
+    re.compile(r'violates unique constraint "([^"]+)"'),
+    re.compile(r"Duplicate entry .* for key '([^']+)'"),
+)
+
+
+def _violated_constraint(orig):
+    # psycopg2 exposes the constraint directly for SQLSTATE 23505
+    diag = getattr(orig, 'diag', None)
+    if getattr(orig, 'pgcode', None) == '23505' and getattr(diag, 'constraint_name', None):
+        return diag.constraint_name
+    text = str(orig)
+    for pattern in UNIQUE_VIOLATION_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    return None
+
+
+def unique_violation_message(error):
+    # Map a unique-constraint IntegrityError to the API message for the column it names;
+    # other integrity errors (NOT NULL, foreign keys) return None
+    constraint = _violated_constraint(getattr(error, 'orig', error))
+    if constraint is None:
+        return None
+    constraint = constraint.lower()
+    for field, message in UNIQUE_FIELD_MESSAGES.items():
+        if field in constraint:
+            return message
+    return None
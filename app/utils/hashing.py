@@ -0,0 +1,214 @@
+import asyncio
+import os
+import random
+import threading
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app, jsonify
+from werkzeug.security import generate_password_hash, check_password_hash
+from app.utils.metrics import timed
+
+
+class HashPoolSaturated(Exception):
+    pass
+
+
+# Bounded process pool for KDF work; admission is capped at workers + queue size
+class _HashPool:
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        # Executors don't survive fork, so each gunicorn worker builds its own
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # Imported on first use: multiprocessing adds ~50ms to every worker's startup
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashPoolSaturated()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise HashPoolSaturated()
+
+    async def run_async(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashPoolSaturated()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise HashPoolSaturated()
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Host-wide admission for KDF work: one lock file per slot in a shared directory. flock locks
+# belong to the open file, so threads in one process exclude each other too, and the kernel
+# releases them when a worker dies.
+class _HostSlots:
+    def __init__(self, directory, limit):
+        os.makedirs(directory, exist_ok=True)
+        self._paths = [os.path.join(directory, f'slot-{n}.lock') for n in range(limit)]
+
+    @contextmanager
+    def acquire(self):
+        import fcntl
+        start = random.randrange(len(self._paths))
+        for path in self._paths[start:] + self._paths[:start]:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            try:
+                yield
+            finally:
+                os.close(fd)
+            return
+        raise HashPoolSaturated()
+
+
+class PasswordHasher:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+        pool = None
+        if workers > 0:
+            pool = _HashPool(
+                workers,
+                app.config.get('PASSWORD_HASH_QUEUE_SIZE', 0),
+                app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+            )
+        app.extensions['password_hasher'] = pool
+        limit = app.config.get('PASSWORD_HASH_HOST_LIMIT', 0)
+        app.extensions['password_hasher_slots'] = _HostSlots(
+            app.config['PASSWORD_HASH_SLOTS_DIR'], limit
+        ) if limit > 0 else None
+        # Async callers without a process pool hash on a dedicated thread pool, so KDF work
+        # can't take every thread the other offloaded calls need
+        app.extensions['password_hasher_threads'] = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1, thread_name_prefix='kdf'
+        )
+        # One bulk import per process at a time (see bulk_import)
+        app.extensions['password_hasher_bulk'] = threading.BoundedSemaphore(1)
+        app.register_error_handler(HashPoolSaturated, _saturated_response)
+
+    def _admit(self):
+        slots = current_app.extensions.get('password_hasher_slots')
+        return slots.acquire() if slots is not None else nullcontext()
+
+    def _run(self, operation, fn, *args):
+        pool = current_app.extensions.get('password_hasher')
+        with self._admit(), timed('kdf', operation=operation):
+            if pool is None:
+                return fn(*args)
+            return pool.run(fn, *args)
+
+    async def _run_async(self, operation, fn, *args):
+        # Keeps the event loop free: KDF work goes to the process pool or the kdf thread pool
+        pool = current_app.extensions.get('password_hasher')
+        with self._admit(), timed('kdf', operation=operation):
+            if pool is None:
+                executor = current_app.extensions['password_hasher_threads']
+                return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            return await pool.run_async(fn, *args)
+
+    def _hash_args(self, password):
+        return (
+            password,
+            current_app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2'),
+            current_app.config.get('PASSWORD_HASH_SALT_LENGTH', 16)
+        )
+
+    def hash(self, password):
+        return self._run('hash', generate_password_hash, *self._hash_args(password))
+
+    def verify(self, pwhash, password):
+        return self._run('verify', check_password_hash, pwhash, password)
+
+    async def hash_async(self, password):
+        return await self._run_async('hash', generate_password_hash, *self._hash_args(password))
+
+    async def verify_async(self, pwhash, password):
+        return await self._run_async('verify', check_password_hash, pwhash, password)
+
+    @contextmanager
+    def bulk_import(self):
+        # Admission for imports on the request path: a second concurrent import in this process
+        # gets a 503 instead of stacking more KDF work on the host
+        lane = current_app.extensions['password_hasher_bulk']
+        if not lane.acquire(blocking=False):
+            raise HashPoolSaturated()
+        try:
+            yield
+        finally:
+            lane.release()
+
+    def hash_many(self, passwords, workers=None):
+        # Imports hash on their own short-lived process pool, never the login/signup pool,
+        # so they can't starve it
+        if workers is None:
+            workers = current_app.config.get('USER_IMPORT_HASH_WORKERS', 1)
+        fn = partial(
+            generate_password_hash,
+            method=current_app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2'),
+            salt_length=current_app.config.get('PASSWORD_HASH_SALT_LENGTH', 16)
+        )
+        passwords = list(passwords)
+        with timed('kdf', operation='hash_many'):
+            return self._hash_many(fn, passwords, workers)
+
+    def _hash_many(self, fn, passwords, workers):
+        if workers > 1 and len(passwords) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            workers = min(workers, len(passwords))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(fn, passwords, chunksize=_chunksize(len(passwords), workers)))
+        return [fn(password) for password in passwords]
+
+
+def _chunksize(count, workers):
+    return max(1, count // (workers * 4))
+
+
+def _saturated_response(error):
+    response = jsonify({"error": "Server busy, please retry"})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(current_app.config.get('PASSWORD_HASH_RETRY_AFTER', 1))
+    return response
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,255 @@
+import datetime
+import hashlib
+import math
+import threading
+import time
+from flask import current_app
+from app.models import db
+from app.models.user import User
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        if key in self:
+            return
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def estimated_error_rate(self):
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class _IndexState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.filter = None
+        self.watermark = None
+        self.synced_at = 0.0
+        self.building = False
+        self.stale = 0
+        self.checks = 0
+        self.syncs = 0
+        self.definite_misses = 0
+        self.false_positives = 0
+
+
+def _username_key(username):
+    return f'u:{username}'
+
+
+def _email_key(email):
+    return f'e:{email}'
+
+
+def _contains(bloom, username, email):
+    return (
+        (username is not None and _username_key(username) in bloom)
+        or (email is not None and _email_key(email) in bloom)
+    )
+
+
+# Per-process Bloom filter of existing usernames and emails. A miss is definite, so login can
+# reject unknown usernames without a user lookup; a hit still goes to the database.
+class MembershipIndex:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['membership_index'] = _IndexState()
+
+    @property
+    def _state(self):
+        return current_app.extensions['membership_index']
+
+    @property
+    def enabled(self):
+        return current_app.config.get('MEMBERSHIP_INDEX_ENABLED', True)
+
+    def warm(self):
+        # Built at startup when the schema exists; otherwise in the background on first use
+        if self.enabled and db.inspect(db.engine).has_table(User.__tablename__):
+            built = self._build()
+            with self._state.lock:
+                self._install(self._state, *built, 0)
+
+    def _build(self):
+        config = current_app.config
+        bloom = BloomFilter(config['MEMBERSHIP_INDEX_CAPACITY'], config['MEMBERSHIP_INDEX_ERROR_RATE'])
+        watermark = None
+        started_at = datetime.datetime.utcnow()
+        synced_at = time.monotonic()
+        started = time.perf_counter()
+        # Own connection on the primary, so the request's session and routing are untouched
+        with db.engine.connect() as connection:
+            rows = connection.execution_options(yield_per=10000).execute(
+                db.select(User.username, User.email, User.updated_at)
+            )
+            for username, email, updated_at in rows:
+                bloom.add(_username_key(username))
+                bloom.add(_email_key(email))
+                if updated_at and (watermark is None or updated_at > watermark):
+                    watermark = updated_at
+
+        current_app.logger.info(
+            'Membership index built: %d keys, %.1f KiB, %d hashes, estimated false-positive rate %.4f (%.1fms)',
+            bloom.count, len(bloom.bits) / 1024, bloom.num_hashes, bloom.estimated_error_rate(),
+            (time.perf_counter() - started) * 1000
+        )
+        # Rows committed during the scan may sit behind its cursor; syncing from the start of
+        # the scan picks them up
+        if watermark is not None:
+            watermark = min(watermark, started_at)
+        return bloom, watermark, synced_at
+
+    def _install(self, state, bloom, watermark, synced_at, stale_before):
+        state.filter = bloom
+        state.watermark = watermark
+        state.synced_at = synced_at
+        # Keys marked stale while the build ran may still be in the new filter
+        state.stale -= stale_before
+
+    def _start_build(self, state):
+        # Called with the lock held. Requests keep using the current filter, or the database
+        # if there is none yet, while the table is scanned on a background thread.
+        if state.building:
+            return
+        state.building = True
+        app = current_app._get_current_object()
+        threading.Thread(
+            target=self._build_in_background, args=(app, state, state.stale),
+            name='membership-index', daemon=True
+        ).start()
+
+    def _build_in_background(self, app, state, stale_before):
+        with app.app_context():
+            try:
+                built = self._build()
+                with state.lock:
+                    self._install(state, *built, stale_before)
+            except Exception:
+                app.logger.exception('Membership index build failed')
+            finally:
+                state.building = False
+
+    def _due(self, state, checked_at):
+        return checked_at - state.synced_at >= current_app.config['MEMBERSHIP_INDEX_SYNC_INTERVAL']
+
+    def _sync(self, state, checked_at):
+        # Picks up rows written by other workers since the last sync; an indexed range on
+        # updated_at. Concurrent misses share one sync: a caller that waited for the lock while
+        # another sync ran skips its own.
+        with state.sync_lock:
+            if not self._due(state, checked_at):
+                return
+            synced_at = time.monotonic()
+            statement = db.select(User.username, User.email, User.updated_at)
+            if state.watermark is not None:
+                overlap = datetime.timedelta(seconds=current_app.config['MEMBERSHIP_INDEX_SYNC_OVERLAP'])
+                statement = statement.where(User.updated_at >= state.watermark - overlap)
+            with db.engine.connect() as connection:
+                rows = connection.execute(statement).all()
+            with state.lock:
+                for username, email, updated_at in rows:
+                    state.filter.add(_username_key(username))
+                    state.filter.add(_email_key(email))
+                    if updated_at and (state.watermark is None or updated_at > state.watermark):
+                        state.watermark = updated_at
+                state.synced_at = max(state.synced_at, synced_at)
+                state.syncs += 1
+
+    def _ready_filter(self):
+        state = self._state
+        with state.lock:
+            if (
+                state.filter is None
+                or state.filter.count > state.filter.capacity
+                or state.stale > state.filter.capacity // 10
+            ):
+                self._start_build(state)
+            return state.filter
+
+    def might_exist(self, username=None, email=None):
+        return self.might_exist_many([(username, email)])[0]
+
+    def might_exist_many(self, keys):
+        # keys are (username, email) pairs; either may be None
+        if not self.enabled:
+            return [True] * len(keys)
+        state = self._state
+        checked_at = time.monotonic()
+        bloom = self._ready_filter()
+        if bloom is None:
+            return [True] * len(keys)
+
+        state.checks += len(keys)
+        results = [_contains(bloom, username, email) for username, email in keys]
+        if not all(results) and self._due(state, checked_at):
+            # Other workers' writes only reach this filter through a sync. Misses within
+            # SYNC_INTERVAL of the last one are answered as they are; later ones sync first.
+            self._sync(state, checked_at)
+            bloom = state.filter
+            results = [result or _contains(bloom, username, email) for result, (username, email) in zip(results, keys)]
+        state.definite_misses += results.count(False)
+        return results
+
+    def record_false_positive(self):
+        if self.enabled:
+            self._state.false_positives += 1
+
+    def add(self, username, email):
+        state = self._state
+        with state.lock:
+            if state.filter is not None:
+                state.filter.add(_username_key(username))
+                state.filter.add(_email_key(email))
+
+    def mark_stale(self, count=1):
+        # Bloom filters can't remove keys; stale keys only cost a query until the next rebuild
+        state = self._state
+        with state.lock:
+            state.stale += count
+
+    def stats(self):
+        state = self._state
+        bloom = state.filter
+        stats = {
+            'checks': state.checks,
+            'syncs': state.syncs,
+            'definite_misses': state.definite_misses,
+            'false_positives': state.false_positives,
+            'stale': state.stale
+        }
+        if bloom is not None:
+            stats.update(
+                size=bloom.count,
+                capacity=bloom.capacity,
+                bytes=len(bloom.bits),
+                hashes=bloom.num_hashes,
+                target_error_rate=bloom.error_rate,
+                estimated_error_rate=bloom.estimated_error_rate()
+            )
+        return stats
+
+
+membership_index = MembershipIndex()
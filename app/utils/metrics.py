@@ -0,0 +1,226 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from flask import g, has_request_context
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+# Per-process metric registry; metrics are keyed by name and a sorted label tuple
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self.help = {}
+
+    def _get(self, kind, name, labels, factory):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = self._metrics[key] = (kind, factory())
+        return metric[1]
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            self._get('counter', name, labels, Counter).inc(amount)
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        with self._lock:
+            self._get('histogram', name, labels, lambda: Histogram(buckets)).observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {key: (kind, metric) for key, (kind, metric) in self._metrics.items()}
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def samples(self):
+        samples = []
+        for (name, labels), (kind, metric) in self.snapshot().items():
+            sample = {'name': name, 'kind': kind, 'labels': dict(labels)}
+            if kind == 'counter':
+                sample['value'] = metric.value
+            else:
+                sample.update(
+                    buckets=list(metric.buckets), counts=list(metric.counts),
+                    sum=metric.sum, count=metric.count
+                )
+            samples.append(sample)
+        return samples
+
+
+registry = Registry()
+
+
+def request_timings():
+    if not has_request_context():
+        return None
+    if '_timings' not in g:
+        g._timings = {}
+    return g._timings
+
+
+@contextmanager
+def timed(name, **labels):
+    # Observes a histogram and adds the elapsed time to the current request's Server-Timing
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe(f'{name}_seconds', elapsed, **labels)
+        timings = request_timings()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+EXITED_FILE = 'exited.json'
+
+
+# Shared directory where each worker periodically writes its samples, so any worker can serve
+# a scrape that covers the whole gunicorn master. The directory must start empty for each
+# server run: gunicorn.conf.py clears it when the master starts (other servers need it cleared
+# before they start) and folds exited workers' files into one.
+class MultiProcessStore:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _write(self, name, samples):
+        path = self._path(name)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(samples, f)
+        os.replace(tmp_path, path)
+
+    def write(self, pid, samples):
+        self._write(f'metrics_{pid}.json', samples)
+
+    def mark_process_dead(self, pid):
+        # Called in the master when a worker exits: its counters and histograms are merged into
+        # one file, so they keep counting and a new worker reusing the pid can't overwrite them
+        path = self._path(f'metrics_{pid}.json')
+        samples = [sample for sample in self._read(path) if sample['kind'] != 'gauge']
+        if samples:
+            self._write(EXITED_FILE, merge_samples(self._read(self._path(EXITED_FILE)) + samples))
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(('.json', '.tmp')):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def read_all(self):
+        samples = list(self._read(self._path(EXITED_FILE)))
+        for entry in os.scandir(self.directory):
+            if not (entry.name.startswith('metrics_') and entry.name.endswith('.json')):
+                continue
+            pid = int(entry.name[len('metrics_'):-len('.json')])
+            worker_samples = self._read(entry.path)
+            alive = _pid_alive(pid)
+            for sample in worker_samples:
+                # Counters and histograms from exited workers still count; their gauges don't
+                if sample['kind'] == 'gauge' and not alive:
+                    continue
+                samples.append(sample)
+        return samples
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_samples(samples):
+    merged = {}
+    for sample in samples:
+        key = (sample['name'], sample['kind'], tuple(sorted(sample['labels'].items())))
+        current = merged.get(key)
+        if current is None:
+            merged[key] = dict(sample, counts=list(sample.get('counts', [])))
+        elif sample['kind'] == 'histogram':
+            current['counts'] = [a + b for a, b in zip(current['counts'], sample['counts'])]
+            current['sum'] += sample['sum']
+            current['count'] += sample['count']
+        else:
+            current['value'] += sample['value']
+    return list(merged.values())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+def render_prometheus(samples):
+    lines = []
+    seen = set()
+    for sample in sorted(samples, key=lambda sample: (sample['name'], sorted(sample['labels'].items()))):
+        name, kind, labels = sample['name'], sample['kind'], sample['labels']
+        if name not in seen:
+            seen.add(name)
+            lines.append(f'# TYPE {name} {kind}')
+        if kind != 'histogram':
+            lines.append(f"{name}{_format_labels(labels)} {sample['value']}")
+            continue
+        cumulative = 0
+        for bound, count in zip(sample['buckets'] + ['+Inf'], sample['counts']):
+            cumulative += count
+            lines.append(f'{name}_bucket{_format_labels(labels, le=bound)} {cumulative}')
+        lines.append(f"{name}_sum{_format_labels(labels)} {sample['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {sample['count']}")
+    return '\n'.join(lines) + '\n'
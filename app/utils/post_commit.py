@@ -0,0 +1,139 @@
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from flask import current_app
+from app.utils.metrics import registry, timed, COUNT_BUCKETS
+from app.utils.user_cache import user_cache
+from app.utils.response_cache import response_cache
+
+audit_logger = logging.getLogger('app.audit')
+
+
+class _QueueState:
+    def __init__(self, app):
+        self.app = app
+        self.queue = queue.Queue(maxsize=app.config['POST_COMMIT_QUEUE_SIZE'])
+        self.lock = threading.Lock()
+        # Guards the batch being collected, so shutdown can flush it alongside the queue
+        self.flush_lock = threading.Lock()
+        self.pending = []
+        self.thread = None
+        self.pid = None
+
+
+# Runs the side effects of user writes after the response, on a background thread that
+# coalesces them into batched flushes. The written user's own cache entries are dropped
+# synchronously; list pages may serve the old value for up to POST_COMMIT_FLUSH_INTERVAL.
+class PostCommitQueue:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['post_commit'] = _QueueState(app)
+
+    @property
+    def _state(self):
+        return current_app.extensions['post_commit']
+
+    def user_changed(self, action, user_id, actor_id=None, fields=()):
+        # One cheap delete each, so the writer's next read of the user can't see the old body
+        user_cache.invalidate(user_id)
+        response_cache.delete_user(user_id)
+
+        event = {
+            'action': action,
+            'user_id': user_id,
+            'actor_id': actor_id,
+            'fields': list(fields),
+            'at': datetime.datetime.utcnow().isoformat()
+        }
+        if not current_app.config['POST_COMMIT_ASYNC']:
+            self._flush(current_app._get_current_object(), [event])
+            return
+
+        state = self._state
+        self._ensure_worker(state)
+        try:
+            state.queue.put_nowait(event)
+        except queue.Full:
+            # The worker is behind; apply this one inline rather than drop it
+            self._flush(state.app, [event])
+
+    def _ensure_worker(self, state):
+        # Threads don't survive fork, so each gunicorn worker starts its own
+        with state.lock:
+            if state.thread is None or state.pid != os.getpid():
+                if state.pid != os.getpid():
+                    state.queue = queue.Queue(maxsize=state.app.config['POST_COMMIT_QUEUE_SIZE'])
+                state.thread = threading.Thread(target=self._run, args=(state,), name='post-commit', daemon=True)
+                state.pid = os.getpid()
+                state.thread.start()
+                atexit.register(self._drain, state)
+
+    def _run(self, state):
+        config = state.app.config
+        while True:
+            event = state.queue.get()
+            deadline = time.monotonic() + config['POST_COMMIT_FLUSH_INTERVAL']
+            while True:
+                with state.flush_lock:
+                    state.pending.append(event)
+                    if len(state.pending) >= config['POST_COMMIT_BATCH_SIZE']:
+                        break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event = state.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            self._flush_pending(state)
+
+    def _flush_pending(self, state):
+        with state.flush_lock:
+            batch, state.pending = state.pending, []
+            if not batch:
+                return
+            try:
+                self._flush(state.app, batch)
+            except Exception:
+                state.app.logger.exception('Post-commit flush of %d events failed', len(batch))
+            finally:
+                for _ in batch:
+                    state.queue.task_done()
+
+    def _drain(self, state):
+        # Runs at interpreter exit, including gunicorn and uvicorn worker shutdown on SIGTERM.
+        # The daemon thread dies with the process, so the batch it is collecting and anything
+        # still queued are flushed here.
+        if state.pid != os.getpid():
+            return
+        with state.flush_lock:
+            while True:
+                try:
+                    state.pending.append(state.queue.get_nowait())
+                except queue.Empty:
+                    break
+        self._flush_pending(state)
+
+    def _flush(self, app, events):
+        # Every list page is retired with one generation bump per batch
+        with app.app_context(), timed('post_commit_flush'):
+            response_cache.invalidate_lists()
+            if app.config['AUDIT_LOG_ENABLED']:
+                for event in events:
+                    audit_logger.info(json.dumps(event))
+        registry.observe('post_commit_batch_size', len(events), buckets=COUNT_BUCKETS)
+
+    def join(self):
+        # Blocks until everything queued so far has been flushed
+        self._state.queue.join()
+
+
+post_commit = PostCommitQueue()
@@ -0,0 +1,61 @@
+import datetime
+from app.models import db
+from app.models.user import User
+from app.utils.user_query import UserListQuery
+
+
+def access_paths():
+    # (name, representative statement, indexes the plan is expected to use). Listing paths are
+    # built by UserListQuery, so they are the statements GET /api/users actually runs.
+    since = datetime.datetime.utcnow()
+    return [
+        (
+            'list filtered by role',
+            UserListQuery(100, role='admin', after=(1,)).statement(),
+            'ix_users_role_id'
+        ),
+        (
+            'list sorted by created_at',
+            UserListQuery(100, sort='created_at', after=(since, 1)).statement(),
+            'ix_users_created_at_id'
+        ),
+        (
+            'username/email prefix search',
+            UserListQuery(100, prefix='ali').statement(),
+            'ix_users_username_lower', 'ix_users_email_lower'
+        ),
+        (
+            'membership index sync',
+            db.select(User.username, User.email, User.updated_at).where(User.updated_at >= since),
+            'ix_users_updated_at'
+        ),
+    ]
+
+
+def explain(connection, statement):
+    compiled = statement.compile(dialect=connection.dialect)
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params).all()
+        return '\n'.join(row[-1] for row in rows)
+    if dialect == 'postgresql':
+        # Small tables make a sequential scan look cheapest; ask whether the index is usable at all
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        rows = connection.exec_driver_sql(f'EXPLAIN {compiled}', params).all()
+        return '\n'.join(row[0] for row in rows)
+    rows = connection.exec_driver_sql(f'EXPLAIN {compiled}', params).mappings().all()
+    return '\n'.join(f"{row.get('table')}: key={row.get('key')} ({row.get('Extra')})" for row in rows)
+
+
+def check_access_paths(engine):
+    results = []
+    with engine.connect() as connection:
+        for name, statement, *indexes in access_paths():
+            plan = explain(connection, statement)
+            results.append((name, indexes, all(index in plan for index in indexes), plan))
+        connection.rollback()
+    return results
@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(value):
+    # '10/minute' -> (capacity 10, refill 10 tokens per 60 seconds)
+    if not value:
+        return None
+    count, _, period = value.partition('/')
+    return int(count), PERIODS[period.strip()]
+
+
+def _refill(tokens, updated, now, capacity, period):
+    return min(capacity, tokens + (now - updated) * capacity / period)
+
+
+def _decide(tokens, capacity, period):
+    # Returns (allowed, remaining tokens, seconds until one token is available)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) * period / capacity
+
+
+class MemoryStore:
+    blocking = False
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, period):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = _decide(_refill(tokens, updated, now, capacity, period), capacity, period)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+
+# Buckets in a local SQLite file so every gunicorn worker on the host shares the same counters
+class SQLiteStore:
+    # Waits on the database lock, so async callers run it off the event loop
+    blocking = True
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._operations = 0
+        with self._connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)'
+            )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def consume(self, key, capacity, period):
+        now = time.time()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            allowed, tokens, retry_after = _decide(_refill(tokens, updated, now, capacity, period), capacity, period)
+            connection.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)', (key, tokens, now)
+            )
+            self._operations += 1
+            if self._operations % 1000 == 0:
+                # Buckets idle for a day are full again; dropping them changes nothing
+                connection.execute('DELETE FROM buckets WHERE updated < ?', (now - 86400,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return allowed, retry_after
+
+
+class RateLimiter:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        storage = app.config.get('RATE_LIMIT_STORAGE', 'memory')
+        if storage == 'memory':
+            store = MemoryStore()
+        elif storage == 'sqlite':
+            store = SQLiteStore(app.config['RATE_LIMIT_SQLITE_PATH'])
+        else:
+            raise ValueError(f'Unknown RATE_LIMIT_STORAGE: {storage}')
+        app.extensions['rate_limiter'] = store
+
+    @property
+    def blocking(self):
+        return current_app.extensions['rate_limiter'].blocking
+
+    def consume(self, key, rate):
+        capacity, period = rate
+        return current_app.extensions['rate_limiter'].consume(key, capacity, period)
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from flask import current_app
+from app.models.routing import primary_pinned, read_from_replica
+from app.utils.cache import TTLCache
+from app.utils.http_cache import is_not_modified, with_validators, not_modified_response
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional
+    redis = None
+
+LIST_GENERATION_KEY = 'users:generation'
+
+
+class NullBackend:
+    blocking = False
+
+    def get(self, key, count=True):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def stats(self):
+        return {'backend': 'none'}
+
+
+class MemoryBackend:
+    blocking = False
+
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key, count=True):
+        return self._cache.get(key, count=count)
+
+    def set(self, key, value, ttl):
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+    def stats(self):
+        return {'backend': 'memory', **self._cache.stats()}
+
+
+class _CountingBackend:
+    # Shared backends do file or network I/O, so async callers run them off the event loop
+    blocking = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _count(self, hit, count=True):
+        if not count:
+            return
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+
+# Shares entries between gunicorn workers through a directory of JSON files
+class FileSystemBackend(_CountingBackend):
+    name = 'filesystem'
+
+    def __init__(self, directory, max_entries):
+        super().__init__()
+        self.directory = directory
+        self.max_entries = max_entries
+        # Pruning scans the whole directory, so it runs once per tenth of the cap in writes;
+        # each worker can overshoot the cap by that much in between
+        self._prune_every = max(1, max_entries // 10)
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def get(self, key, count=True):
+        try:
+            with open(self._path(key)) as f:
+                expires_at, value = json.load(f)
+        except (OSError, ValueError):
+            self._count(False, count)
+            return None
+        if expires_at <= time.time():
+            self.delete(key)
+            self._count(False, count)
+            return None
+        self._count(True, count)
+        return value
+
+    def set(self, key, value, ttl):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump([time.time() + ttl, value], f)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._writes += 1
+            due = self._writes >= self._prune_every
+            if due:
+                self._writes = 0
+        if due:
+            self._prune()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _prune(self):
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+                self.evictions += 1
+            except OSError:
+                pass
+
+
+class RedisBackend(_CountingBackend):
+    name = 'redis'
+
+    def __init__(self, url, prefix='user-api:'):
+        if redis is None:
+            raise RuntimeError('RESPONSE_CACHE_BACKEND=redis requires the redis package')
+        super().__init__()
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key, count=True):
+        raw = self._client.get(self._prefix + key)
+        self._count(raw is not None, count)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self._client.set(self._prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+
+    def delete(self, key):
+        self._client.delete(self._prefix + key)
+
+
+class ResponseCache:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        if backend == 'memory':
+            instance = MemoryBackend(app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL'])
+        elif backend == 'filesystem':
+            instance = FileSystemBackend(app.config['RESPONSE_CACHE_DIR'], app.config['RESPONSE_CACHE_SIZE'])
+        elif backend == 'redis':
+            instance = RedisBackend(app.config['RESPONSE_CACHE_REDIS_URL'])
+        elif backend == 'none':
+            instance = NullBackend()
+        else:
+            raise ValueError(f'Unknown RESPONSE_CACHE_BACKEND: {backend}')
+        app.extensions['response_cache'] = instance
+
+    @property
+    def backend(self):
+        return current_app.extensions['response_cache']
+
+    @property
+    def blocking(self):
+        return self.backend.blocking
+
+    def _store(self, key, body, etag, last_modified):
+        entry = {
+            'body': body,
+            'etag': etag,
+            'last_modified': last_modified.isoformat() if last_modified else None
+        }
+        # A lagging replica can return a row older than the last invalidation, so entries built
+        # from a replica expire after RESPONSE_CACHE_REPLICA_TTL instead
+        ttl = current_app.config['RESPONSE_CACHE_TTL']
+        if read_from_replica():
+            ttl = min(ttl, current_app.config['RESPONSE_CACHE_REPLICA_TTL'])
+        self.backend.set(key, entry, ttl)
+        return entry
+
+    def _lookup(self, key):
+        # Callers pinned to the primary after a write must see it, not a cached copy
+        if primary_pinned():
+            return None
+        return self.backend.get(key)
+
+    def _list_key(self, query_key):
+        # A missing generation (never set, expired or evicted) starts a fresh one rather than
+        # falling back to a fixed value that could match pages cached before a write
+        generation = self.backend.get(LIST_GENERATION_KEY, count=False) or self.invalidate_lists()
+        return f'users:{generation}:{query_key}'
+
+    def get_user(self, user_id):
+        return self._lookup(f'user:{user_id}')
+
+    def set_user(self, user_id, body, etag, last_modified):
+        return self._store(f'user:{user_id}', body, etag, last_modified)
+
+    def get_list(self, query_key):
+        return self._lookup(self._list_key(query_key))
+
+    def set_list(self, query_key, body, etag, last_modified):
+        return self._store(self._list_key(query_key), body, etag, last_modified)
+
+    def delete_user(self, user_id):
+        self.backend.delete(f'user:{user_id}')
+
+    def invalidate_user(self, user_id):
+        self.delete_user(user_id)
+        self.invalidate_lists()
+
+    def invalidate_lists(self):
+        # Lists are keyed by a generation token, so one write retires every cached page
+        generation = uuid.uuid4().hex
+        self.backend.set(LIST_GENERATION_KEY, generation, current_app.config['RESPONSE_CACHE_GENERATION_TTL'])
+        return generation
+
+    def stats(self):
+        return self.backend.stats()
+
+
+def cached_response(entry):
+    last_modified = entry['last_modified']
+    if last_modified:
+        last_modified = datetime.fromisoformat(last_modified)
+    if is_not_modified(entry['etag'], last_modified):
+        return not_modified_response(entry['etag'], last_modified)
+    response = current_app.response_class(entry['body'], mimetype='application/json')
+    return with_validators(response, entry['etag'], last_modified)
+
+
+response_cache = ResponseCache()
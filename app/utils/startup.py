@@ -0,0 +1,71 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Runs in a fresh interpreter so the import report isn't skewed by modules already loaded
+PROFILE_SCRIPT = '''
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'phases': app.extensions['startup_profile'].phases
+}))
+'''
+
+
+# Wall-clock breakdown of create_app, kept in app.extensions['startup_profile']
+class StartupProfile:
+    def __init__(self):
+        self.phases = []
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+
+def parse_importtime(report):
+    # `-X importtime` lines: "import time: <self us> | <cumulative us> | <indented module>"
+    imports = []
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        imports.append((module.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def package_totals(imports):
+    totals = {}
+    for module, self_us, _ in imports:
+        package = module.split('.')[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def profile_startup(root, runs=3, env=None):
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT],
+            cwd=root, env=dict(os.environ, **(env or {})), capture_output=True, text=True, check=True
+        )
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        sample['imports'] = parse_importtime(result.stderr)
+        samples.append(sample)
+    
+    # Report the run with the median total so phases and imports come from the same process
+    samples.sort(key=lambda sample: sample['import'] + sample['create_app'])
+    median = samples[len(samples) // 2]
+    median['totals'] = [sample['import'] + sample['create_app'] for sample in samples]
+    median['median_total'] = statistics.median(median['totals'])
+    return median
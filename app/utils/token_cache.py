@@ -0,0 +1,46 @@
+import hashlib
+import time
+from flask import current_app
+from app.utils.cache import TTLCache
+
+
+# Memoizes verified JWT claims keyed by a digest of the raw token, until the token's exp
+class TokenCache:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['token_cache'] = TTLCache(
+            maxsize=app.config.get('TOKEN_CACHE_SIZE', 10000),
+            ttl=app.config.get('TOKEN_CACHE_MAX_TTL', 300)
+        )
+
+    @property
+    def _cache(self):
+        return current_app.extensions['token_cache']
+
+    def decode(self, token):
+        key = hashlib.sha256(token.encode()).digest()
+        claims = self._cache.get(key)
+        if claims is not None:
+            return dict(claims)
+
+        # Cache misses go through full verification; failures are never cached
+        import jwt
+        claims = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
+
+        exp = claims.get('exp')
+        if exp is not None:
+            ttl = min(exp - time.time(), self._cache.ttl)
+            self._cache.set(key, claims, ttl=ttl)
+        return dict(claims)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+token_cache = TokenCache()
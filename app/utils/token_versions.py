@@ -0,0 +1,91 @@
+import datetime
+import threading
+import time
+from flask import current_app
+from app.models import db
+from app.models.user import User
+
+# Version recorded for users deleted by this process; never matches a token's claim
+REVOKED = -1
+
+
+class _VersionState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.versions = None
+        self.watermark = None
+        self.last_sync = 0.0
+
+
+# Per-process table of users.token_version used to revoke stateless access tokens.
+# Only non-zero versions are kept, so users who never revoked cost nothing.
+class TokenVersions:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['token_versions'] = _VersionState()
+
+    @property
+    def _state(self):
+        return current_app.extensions['token_versions']
+
+    def _load(self, state):
+        with db.engine.connect() as connection:
+            rows = connection.execute(
+                db.select(User.id, User.token_version).where(User.token_version > 0)
+            ).all()
+            watermark = connection.execute(db.select(db.func.max(User.updated_at))).scalar()
+        state.versions = {user_id: version for user_id, version in rows}
+        state.watermark = watermark
+        state.last_sync = time.monotonic()
+
+    def _sync(self, state):
+        # Picks up revocations made by other workers since the last sync
+        statement = db.select(User.id, User.token_version, User.updated_at)
+        if state.watermark is not None:
+            overlap = datetime.timedelta(seconds=current_app.config['TOKEN_VERSION_SYNC_OVERLAP'])
+            statement = statement.where(User.updated_at >= state.watermark - overlap)
+        with db.engine.connect() as connection:
+            for user_id, version, updated_at in connection.execute(statement):
+                if version:
+                    state.versions[user_id] = version
+                else:
+                    state.versions.pop(user_id, None)
+                if updated_at and (state.watermark is None or updated_at > state.watermark):
+                    state.watermark = updated_at
+        state.last_sync = time.monotonic()
+
+    def _table(self):
+        state = self._state
+        with state.lock:
+            if state.versions is None:
+                self._load(state)
+            elif time.monotonic() - state.last_sync >= current_app.config['TOKEN_VERSION_SYNC_INTERVAL']:
+                self._sync(state)
+            return state.versions
+
+    def is_current(self, user_id, version):
+        return self._table().get(user_id, 0) == version
+
+    def set(self, user_id, version):
+        state = self._state
+        with state.lock:
+            if state.versions is not None:
+                if version:
+                    state.versions[user_id] = version
+                else:
+                    state.versions.pop(user_id, None)
+
+    def revoke_deleted(self, user_id):
+        # A deleted row can't be seen by other workers' syncs; their copies of the user's
+        # access tokens lapse at expiry and refresh fails against the database
+        self.set(user_id, REVOKED)
+
+    def stats(self):
+        versions = self._state.versions
+        return {'size': len(versions) if versions is not None else 0}
+
+
+token_versions = TokenVersions()
@@ -0,0 +1,37 @@
+from flask import current_app
+from app.utils.cache import TTLCache
+
+
+# Per-process cache of read-only user snapshots used by the auth middleware
+class UserCache:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['user_cache'] = TTLCache(
+            maxsize=app.config.get('USER_CACHE_SIZE', 10000),
+            ttl=app.config.get('USER_CACHE_TTL', 60)
+        )
+
+    @property
+    def _cache(self):
+        return current_app.extensions['user_cache']
+
+    def get(self, user_id):
+        return self._cache.get(user_id)
+
+    def set(self, snapshot):
+        self._cache.set(snapshot.id, snapshot)
+
+    def invalidate(self, user_id):
+        self._cache.delete(user_id)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+user_cache = UserCache()
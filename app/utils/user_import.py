@@ -0,0 +1,171 @@
+import json
+from itertools import islice
+from sqlalchemy.exc import IntegrityError
+from app.models import db
+from app.models.user import User, user_row_to_dict
+from app.models.user_change import UserChange
+from app.utils.hashing import password_hasher
+from app.utils.errors import unique_violation_message
+from app.utils.response_cache import response_cache
+from app.utils.membership import membership_index
+
+REQUIRED_FIELDS = ('username', 'email', 'password')
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_ndjson(lines):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _validate(row):
+    if not isinstance(row, dict):
+        return "Invalid row"
+    if not all(k in row for k in REQUIRED_FIELDS):
+        return "Missing required fields"
+    if not all(isinstance(row[k], str) and row[k] for k in REQUIRED_FIELDS):
+        return "Invalid field values"
+    if 'role' in row and row['role'] not in ('user', 'admin'):
+        return "Invalid role"
+    return None
+
+
+def _existing(usernames, emails):
+    # One set-based lookup per batch instead of two queries per row
+    rows = db.session.execute(
+        db.select(User.username, User.email).where(
+            db.or_(User.username.in_(usernames), User.email.in_(emails))
+        )
+    ).all()
+    return {row.username for row in rows}, {row.email for row in rows}
+
+
+def _record_created(mappings):
+    # Change log entries for the batch, written in the same transaction as its rows
+    rows = db.session.execute(
+        db.select(*User.public_columns()).where(User.username.in_([mapping['username'] for mapping in mappings]))
+    ).all()
+    db.session.bulk_insert_mappings(UserChange, [
+        {'user_id': row.id, 'action': 'create', 'data': user_row_to_dict(row)}
+        for row in sorted(rows, key=lambda row: row.id)
+    ])
+
+
+def _insert(mappings):
+    try:
+        db.session.bulk_insert_mappings(User, mappings)
+        _record_created(mappings)
+        db.session.commit()
+        return [None] * len(mappings)
+    except IntegrityError:
+        db.session.rollback()
+    
+    # A concurrent writer claimed one of the keys; retry row by row to attribute the failure
+    errors = []
+    for mapping in mappings:
+        try:
+            db.session.bulk_insert_mappings(User, [mapping])
+            _record_created([mapping])
+            db.session.commit()
+            errors.append(None)
+        except IntegrityError as e:
+            db.session.rollback()
+            errors.append(unique_violation_message(e) or "Username or email already exists")
+    return errors
+
+
+def import_users(rows, batch_size=1000, workers=None):
+    results = []
+    seen_usernames = set()
+    seen_emails = set()
+    index = 0
+    
+    for batch in _batches(rows, batch_size):
+        pending = []
+        for row in batch:
+            result = {'index': index}
+            index += 1
+            results.append(result)
+            
+            error = _validate(row)
+            if error is None:
+                result['username'] = row['username']
+                if row['username'] in seen_usernames:
+                    error = "Duplicate username in import"
+                elif row['email'] in seen_emails:
+                    error = "Duplicate email in import"
+            if error:
+                result.update(status='error', error=error)
+                continue
+            
+            seen_usernames.add(row['username'])
+            seen_emails.add(row['email'])
+            pending.append((result, row))
+        
+        if not pending:
+            continue
+        
+        # Rows the membership index has never seen skip the lookup; one created on another
+        # worker since its last sync is still caught by the unique constraint on insert
+        known = membership_index.might_exist_many([(row['username'], row['email']) for _, row in pending])
+        candidates = [row for (_, row), might_exist in zip(pending, known) if might_exist]
+        usernames, emails = _existing(
+            [row['username'] for row in candidates],
+            [row['email'] for row in candidates]
+        ) if candidates else (set(), set())
+        accepted = []
+        for result, row in pending:
+            if row['username'] in usernames:
+                result.update(status='error', error="Username already exists")
+            elif row['email'] in emails:
+                result.update(status='error', error="Email already exists")
+            else:
+                accepted.append((result, row))
+        
+        if not accepted:
+            continue
+        
+        hashes = password_hasher.hash_many([row['password'] for _, row in accepted], workers=workers)
+        mappings = [
+            {
+                'username': row['username'],
+                'email': row['email'],
+                'role': row.get('role', 'user'),
+                'password_hash': password_hash
+            }
+            for (_, row), password_hash in zip(accepted, hashes)
+        ]
+        
+        for (result, row), error in zip(accepted, _insert(mappings)):
+            if error:
+                result.update(status='error', error=error)
+            else:
+                result['status'] = 'created'
+                membership_index.add(row['username'], row['email'])
+    
+    if any(result['status'] == 'created' for result in results):
+        response_cache.invalidate_lists()
+    return results
+
+
+def summarize(results):
+    created = sum(1 for result in results if result['status'] == 'created')
+    return {
+        'created': created,
+        'failed': len(results) - created,
+        'results': results
+    }
@@ -0,0 +1,145 @@
+import datetime
+import sys
+from app.models import db
+from app.models.user import User, user_row_to_dict
+from app.utils.pagination import encode_cursor, decode_cursor, parse_limit
+
+# Public columns, in User.public_columns() order
+FIELDS = ('id', 'username', 'role', 'email', 'created_at', 'updated_at')
+SORT_FIELDS = ('id', 'username', 'email', 'created_at', 'updated_at')
+DATETIME_FIELDS = ('created_at', 'updated_at')
+
+
+def _serialize(value):
+    return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+
+def _prefix_match(column, prefix):
+    # The range on lower(column) is what the lower() expression indexes can serve;
+    # startswith keeps the result exact whatever the collation does at the range edges
+    expression = db.func.lower(column)
+    match = expression.startswith(prefix, autoescape=True)
+    if ord(prefix[-1]) == sys.maxunicode:
+        # No code point sorts after the last one, so there is no upper bound to range on
+        return match
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return db.and_(expression >= prefix, expression < upper, match)
+
+
+# Filters, sort order, projection and keyset position for a GET /api/users listing,
+# all applied in SQL
+class UserListQuery:
+    def __init__(self, limit, role=None, prefix=None, created_after=None, sort='id', fields=None, after=None):
+        self.limit = limit
+        self.role = role
+        self.prefix = prefix
+        self.created_after = created_after
+        self.sort = sort
+        self.fields = fields
+        self.after = after
+
+    @classmethod
+    def from_args(cls, args, config):
+        try:
+            limit = parse_limit(args.get('limit'), config['USERS_PAGE_SIZE'], config['USERS_MAX_PAGE_SIZE'])
+        except (TypeError, ValueError):
+            raise ValueError('Invalid pagination parameters')
+
+        sort = args.get('sort', 'id')
+        if sort.lstrip('-') not in SORT_FIELDS:
+            raise ValueError(f"Invalid sort field, expected one of: {', '.join(SORT_FIELDS)}")
+
+        fields = None
+        if args.get('fields'):
+            fields = tuple(dict.fromkeys(field.strip() for field in args['fields'].split(',')))
+            if not set(fields) <= set(FIELDS):
+                raise ValueError(f"Invalid fields, expected any of: {', '.join(FIELDS)}")
+
+        created_after = None
+        if args.get('created_after'):
+            try:
+                created_after = datetime.datetime.fromisoformat(args['created_after'])
+            except ValueError:
+                raise ValueError('Invalid created_after, expected an ISO 8601 timestamp')
+
+        prefix = args.get('q', '').strip().lower() or None
+        query = cls(limit, args.get('role') or None, prefix, created_after, sort, fields)
+        query.after = query._parse_cursor(args.get('after'))
+        return query
+
+    @property
+    def sort_field(self):
+        return self.sort.lstrip('-')
+
+    @property
+    def descending(self):
+        return self.sort.startswith('-')
+
+    def _parse_cursor(self, cursor):
+        try:
+            payload = decode_cursor(cursor)
+            if payload is None:
+                return None
+            # Cursors are only valid for the sort order that produced them
+            if payload.get('sort', 'id') != self.sort:
+                raise ValueError('Invalid pagination parameters')
+            after_id = int(payload['id'])
+            if self.sort_field == 'id':
+                return (after_id,)
+            value = payload['value']
+            if self.sort_field in DATETIME_FIELDS:
+                value = datetime.datetime.fromisoformat(value)
+            return (value, after_id)
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('Invalid pagination parameters')
+
+    def cursor_for(self, row):
+        if self.sort == 'id':
+            return encode_cursor({'id': row.id})
+        payload = {'id': row.id, 'sort': self.sort}
+        if self.sort_field != 'id':
+            payload['value'] = _serialize(getattr(row, self.sort_field))
+        return encode_cursor(payload)
+
+    def _column_names(self):
+        # The cursor needs id and the sort column even when the client didn't ask for them
+        names = list(self.fields or FIELDS)
+        return names + [name for name in ('id', self.sort_field) if name not in names]
+
+    def statement(self, paginate=True):
+        statement = db.select(*(getattr(User, name) for name in self._column_names()))
+        if self.role is not None:
+            statement = statement.where(User.role == self.role)
+        if self.prefix is not None:
+            statement = statement.where(db.or_(
+                _prefix_match(User.username, self.prefix),
+                _prefix_match(User.email, self.prefix)
+            ))
+        if self.created_after is not None:
+            statement = statement.where(User.created_at > self.created_after)
+
+        column = getattr(User, self.sort_field)
+        keys = (column,) if self.sort_field == 'id' else (column, User.id)
+        if self.after is not None:
+            position = db.tuple_(*keys) if len(keys) > 1 else keys[0]
+            after = db.tuple_(*self.after) if len(keys) > 1 else self.after[0]
+            statement = statement.where(position < after if self.descending else position > after)
+        statement = statement.order_by(*(key.desc() if self.descending else key for key in keys))
+
+        if paginate:
+            # One extra row tells whether there is a next page
+            statement = statement.limit(self.limit + 1)
+        return statement
+
+    def serialize(self, row):
+        if self.fields is None and len(row) == len(FIELDS):
+            return user_row_to_dict(row)
+        mapping = row._mapping
+        return {name: _serialize(mapping[name]) for name in (self.fields or FIELDS)}
+
+    def key(self):
+        # Canonical form used for cache keys and ETags
+        return repr((
+            self.role, self.prefix, self.created_after and self.created_after.isoformat(),
+            self.sort, self.fields, self.after and tuple(_serialize(value) for value in self.after), self.limit
+        ))
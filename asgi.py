@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from app import create_app
+from app.config.config import AsgiConfig
+
+
+# WSGI calls get their own threads. Async views called from them are scheduled back onto the
+# server's event loop and offload blocking work with asyncio.to_thread, which uses the loop's
+# default executor; if WSGI calls ran there too, a full pool of them waiting on their views
+# would leave no thread for that work and every request would hang.
+_wsgi_executor = ThreadPoolExecutor(max_workers=AsgiConfig.ASGI_WSGI_THREADS, thread_name_prefix='wsgi')
+
+
+class _ConcurrentWsgiToAsgiInstance(WsgiToAsgiInstance):
+    # asgiref runs every WSGI call on one shared thread by default; use the executor instead
+    run_wsgi_app = sync_to_async(
+        WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False, executor=_wsgi_executor
+    )
+
+
+class ConcurrentWsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        # Only the application is passed: the duplicate_header_limit argument is newer than
+        # the pinned asgiref
+        await _ConcurrentWsgiToAsgiInstance(self.wsgi_application)(scope, receive, send)
+
+
+flask_app = create_app(AsgiConfig)
+app = ConcurrentWsgiToAsgi(flask_app)
+
+# Run with: uvicorn asgi:app --workers 4
@@ -0,0 +1,64 @@
+import argparse
+import json
+import os
+import tempfile
+from benchmarks.common import BENCH_PASSWORD, bench_app, seed_users, git_revision
+from benchmarks.loadgen import http_load, gunicorn, uvicorn
+
+
+def seed(database_url, count):
+    # Returns an access token for user0, valid on the servers since they share SECRET_KEY
+    app = bench_app(database_url)
+    with app.app_context():
+        seed_users(count)
+    response = app.test_client().post('/api/auth/login', json={'username': 'user0', 'password': BENCH_PASSWORD})
+    return response.get_json()['token']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare gunicorn sync workers with the ASGI entry point.')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument(
+        '--auth-concurrency', type=int, default=200,
+        help='Concurrency for authenticated reads; keep it above the per-worker thread pools'
+    )
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    database_url = f'sqlite:///{tempfile.mkdtemp()}/bench.db'
+    token = seed(database_url, args.users)
+    # Disable the response cache so every request reaches the handlers and the database
+    env = {'DATABASE_URL': database_url, 'RESPONSE_CACHE_BACKEND': 'none', 'PYTHONPATH': os.getcwd()}
+
+    results = {'revision': git_revision(), 'users': args.users, 'concurrency': args.concurrency, 'workers': args.workers}
+    servers = {
+        'gunicorn_sync': gunicorn(18001, workers=args.workers, env=env),
+        'uvicorn_asgi': uvicorn(18002, workers=args.workers, env=env)
+    }
+    for name, server in servers.items():
+        with server:
+            results[name] = {
+                'get_users': http_load(server.url, 'GET', '/api/users?limit=50', args.requests, args.concurrency),
+                # Authenticated async views offload the token, rate-limit and cache work to
+                # threads while their WSGI call holds another; this catches pool deadlocks
+                'get_user_authenticated': http_load(
+                    server.url, 'GET', '/api/users/1', args.requests, args.auth_concurrency,
+                    headers={'Authorization': f'Bearer {token}'}
+                ),
+                'create_user_duplicate': http_load(
+                    server.url, 'POST', '/api/create', args.requests // 10, args.concurrency,
+                    body={'username': 'user1', 'email': 'user1@example.com', 'password': 'password'}
+                )
+            }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
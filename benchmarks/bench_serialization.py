@@ -0,0 +1,57 @@
+import argparse
+import json
+import time
+from flask.json.provider import DefaultJSONProvider
+from app.models import db
+from app.models.user import User, user_row_to_dict
+from app.utils.json_provider import FastJSONProvider
+from benchmarks.common import bench_app, seed_users
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare User list serialization paths.')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    app = bench_app()
+    stdlib_json = DefaultJSONProvider(app)
+    fast_json = FastJSONProvider(app)
+
+    with app.test_request_context():
+        seed_users(args.rows)
+
+        def orm_to_dict():
+            stdlib_json.response([user.to_dict() for user in User.query.all()])
+
+        def columns_fast():
+            rows = db.session.execute(db.select(*User.public_columns())).all()
+            fast_json.response([user_row_to_dict(row) for row in rows])
+
+        results = {
+            'rows': args.rows,
+            'orjson': FastJSONProvider.available,
+            'orm_to_dict_stdlib_seconds': best_of(orm_to_dict, args.repeat),
+            'columns_fast_provider_seconds': best_of(columns_fast, args.repeat)
+        }
+        results['speedup'] = results['orm_to_dict_stdlib_seconds'] / results['columns_fast_provider_seconds']
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
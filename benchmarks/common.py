@@ -0,0 +1,63 @@
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from werkzeug.security import generate_password_hash
+from app import create_app
+from app.config.config import Config
+from app.models import db
+from app.models.user import User
+
+BENCH_PASSWORD = 'password'
+
+
+def bench_app(database_url=None, **overrides):
+    settings = dict(
+        SQLALCHEMY_DATABASE_URI=database_url or f'sqlite:///{tempfile.mkdtemp()}/bench.db',
+        RESPONSE_CACHE_BACKEND='none',
+        RATE_LIMIT_ENABLED=False,
+        **overrides
+    )
+    config = type('BenchConfig', (Config,), settings)
+    return create_app(config)
+
+
+def seed_users(count, start=0):
+    # One shared hash keeps seeding fast; every account still logs in with BENCH_PASSWORD
+    db.create_all()
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    for offset in range(start, start + count, 10000):
+        db.session.bulk_insert_mappings(User, [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password_hash': password_hash}
+            for i in range(offset, min(start + count, offset + 10000))
+        ])
+        db.session.commit()
+
+
+def measure(fn, iterations, warmup=3):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'mean_us': statistics.fmean(timings) * 1e6,
+        'p50_us': timings[len(timings) // 2] * 1e6,
+        'p99_us': timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,143 @@
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000
+    }
+
+
+def http_load(base_url, method, path, requests, concurrency, headers=None, body=None):
+    # Closed-loop load: each worker thread keeps one keep-alive connection busy
+    parts = urlsplit(base_url)
+    payload = json.dumps(body).encode() if body is not None else None
+    headers = dict(headers or {}, **({'Content-Type': 'application/json'} if payload else {}))
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        local = []
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    break
+            start = time.perf_counter()
+            try:
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status < 500
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - start)
+            else:
+                with lock:
+                    errors[0] += 1
+        connection.close()
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    return summarize(latencies, errors[0], time.perf_counter() - start)
+
+
+def client_load(client, method, path, requests, headers=None, body=None):
+    # Same measurements through the Flask test client (no network, single thread).
+    # body may be a callable taking the request number, for requests that need unique data.
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for n in range(requests):
+        payload = body(n) if callable(body) else body
+        request_start = time.perf_counter()
+        response = client.open(path, method=method, headers=headers, json=payload)
+        response.get_data()
+        if response.status_code < 500:
+            latencies.append(time.perf_counter() - request_start)
+        else:
+            errors += 1
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+class Server:
+    def __init__(self, command, port, env=None):
+        self.command = command
+        self.port = port
+        # Load tests log in far more often than the per-IP limits allow, and drive more
+        # concurrent logins than the host-wide KDF limit admits
+        self.env = dict(os.environ, RATE_LIMIT_ENABLED='false', PASSWORD_HASH_HOST_LIMIT='0', **(env or {}))
+        self.process = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def __enter__(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.process = subprocess.Popen(
+            self.command, cwd=root, env=self.env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=1)
+                connection.request('GET', '/metrics')
+                connection.getresponse().read()
+                return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError(f'Server did not start: {" ".join(self.command)}')
+
+    def __exit__(self, *exc):
+        if self.process and self.process.poll() is None:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                os.killpg(self.process.pid, signal.SIGKILL)
+                self.process.wait()
+
+
+def gunicorn(port, workers=2, threads=1, env=None):
+    return Server([
+        sys.executable, '-m', 'gunicorn', 'run:app', '-b', f'127.0.0.1:{port}',
+        '-w', str(workers), '--threads', str(threads)
+    ], port, env)
+
+
+def uvicorn(port, workers=2, env=None):
+    return Server([
+        sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1',
+        '--port', str(port), '--workers', str(workers), '--log-level', 'warning'
+    ], port, env)
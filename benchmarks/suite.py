@@ -0,0 +1,139 @@
+import argparse
+import datetime
+import json
+import platform
+import tempfile
+from flask import jsonify
+from app.middlewares.auth_middleware import token_required
+from app.models.user import User
+from app.utils.hashing import password_hasher
+from benchmarks.common import BENCH_PASSWORD, bench_app, seed_users, measure, git_revision
+from benchmarks.loadgen import client_load, http_load, gunicorn
+
+
+def login_token(client, username='user0'):
+    response = client.post('/api/auth/login', json={'username': username, 'password': BENCH_PASSWORD})
+    return response.get_json()['token']
+
+
+def api_benchmarks(sizes, iterations, login_iterations):
+    results = {}
+    for size in sizes:
+        app = bench_app()
+        with app.app_context():
+            seed_users(size)
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {login_token(client)}'}
+        
+        scenario = {
+            'get_users_page': client_load(client, 'GET', '/api/users?limit=100', iterations),
+            'get_users_stream': client_load(client, 'GET', '/api/users?stream=ndjson', max(1, iterations // 20)),
+            'get_user': client_load(client, 'GET', f'/api/users/{size // 2 or 1}', iterations, headers=headers)
+        }
+        
+        # Size-independent paths only need measuring once
+        if size == sizes[0]:
+            scenario['login'] = client_load(
+                client, 'POST', '/api/auth/login', login_iterations,
+                body={'username': 'user0', 'password': BENCH_PASSWORD}
+            )
+            scenario['create_user'] = client_load(
+                client, 'POST', '/api/create', login_iterations,
+                body=lambda n: {'username': f'bench{n}', 'email': f'bench{n}@example.com', 'password': BENCH_PASSWORD}
+            )
+            # A new password each time: resending the current one is a no-op update
+            scenario['update_user'] = client_load(
+                client, 'PUT', '/api/users/1', login_iterations, headers=headers,
+                body=lambda n: {'password': f'{BENCH_PASSWORD}-{n}'}
+            )
+        results[f'users_{size}'] = scenario
+    return results
+
+
+def micro_benchmarks(iterations, hash_iterations):
+    app = bench_app()
+    results = {}
+    with app.app_context():
+        seed_users(10)
+        user = User.query.first()
+        results['user_to_dict'] = measure(user.to_dict, iterations)
+        results['password_hash'] = measure(lambda: password_hasher.hash(BENCH_PASSWORD), hash_iterations, warmup=1)
+        results['password_verify'] = measure(
+            lambda: password_hasher.verify(user.password_hash, BENCH_PASSWORD), hash_iterations, warmup=1
+        )
+    
+    token = login_token(app.test_client())
+    protected = token_required(lambda current_user: jsonify({'id': current_user.id}))
+    with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+        results['token_required'] = measure(protected, iterations)
+    return results
+
+
+def gunicorn_benchmarks(size, requests, concurrency, workers):
+    database_url = f'sqlite:///{tempfile.mkdtemp()}/bench.db'
+    app = bench_app(database_url)
+    with app.app_context():
+        seed_users(size)
+    token = login_token(app.test_client())
+    headers = {'Authorization': f'Bearer {token}'}
+    
+    env = {'DATABASE_URL': database_url, 'RESPONSE_CACHE_BACKEND': 'none'}
+    with gunicorn(18010, workers=workers, env=env) as server:
+        return {
+            'get_users_page': http_load(server.url, 'GET', '/api/users?limit=100', requests, concurrency),
+            'get_user': http_load(server.url, 'GET', '/api/users/1', requests, concurrency, headers=headers),
+            'login': http_load(
+                server.url, 'POST', '/api/auth/login', max(1, requests // 50), concurrency,
+                body={'username': 'user0', 'password': BENCH_PASSWORD}
+            )
+        }
+
+
+def compare(current, baseline, path=()):
+    # Prints relative change of every latency/throughput figure present in both result sets
+    for key, value in current.items():
+        if key not in baseline:
+            continue
+        if isinstance(value, dict):
+            compare(value, baseline[key], path + (key,))
+        elif isinstance(value, (int, float)) and key.endswith(('_us', '_ms', '_rps')) and baseline[key]:
+            change = (value - baseline[key]) / baseline[key] * 100
+            print(f"{'.'.join(path + (key,))}: {baseline[key]:.1f} -> {value:.1f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the user API hot paths.')
+    parser.add_argument('--sizes', default='1000,10000', help='Comma-separated table sizes')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--login-iterations', type=int, default=10)
+    parser.add_argument('--gunicorn', action='store_true', help='Also drive a local gunicorn server')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    args = parser.parse_args()
+    
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = {
+        'revision': git_revision(),
+        'timestamp': datetime.datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'api': api_benchmarks(sizes, args.iterations, args.login_iterations),
+        'micro': micro_benchmarks(args.iterations * 10, args.login_iterations)
+    }
+    if args.gunicorn:
+        results['gunicorn'] = gunicorn_benchmarks(sizes[-1], args.requests, args.concurrency, args.workers)
+    
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
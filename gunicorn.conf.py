@@ -0,0 +1,25 @@
+import os
+
+# Read by gunicorn from the working directory. Server hooks for multi-process metrics
+# (METRICS_MULTIPROC_DIR); they run in the master.
+
+
+def _metrics_store():
+    directory = os.environ.get('METRICS_MULTIPROC_DIR')
+    if not directory:
+        return None
+    from app.utils.metrics import MultiProcessStore
+    return MultiProcessStore(directory)
+
+
+def on_starting(server):
+    # Files left by a previous run would be summed into every scrape
+    store = _metrics_store()
+    if store is not None:
+        store.clear()
+
+
+def child_exit(server, worker):
+    store = _metrics_store()
+    if store is not None:
+        store.mark_process_dead(worker.pid)
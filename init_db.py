@@ -1,9 +1,44 @@
+import warnings
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import upgrade, stamp
 from app import create_app
 from app.models import db
+from app.models.migrations import init_migrations
+
+# Schema that db.create_all() produced before migrations were introduced
+BASELINE_REVISION = '91dc720ce5b1'
 
 app = create_app()
+init_migrations(app)
+
+
+# Expression indexes can't be reflected on SQLite, so they're left out of the comparison
+warnings.filterwarnings('ignore', message='.*expression-based index')
+
+
+def matches_models(connection):
+    return not compare_metadata(MigrationContext.configure(connection), db.metadata)
+
 
 with app.app_context():
+    inspector = db.inspect(db.engine)
+    tables = inspector.get_table_names()
+    if 'users' in tables and 'alembic_version' not in tables:
+        # Adopt a database created by db.create_all() instead of recreating its tables
+        with db.engine.connect() as connection:
+            current = matches_models(connection)
+        if current:
+            stamp(revision='head')
+            print("Existing database matches the current models; stamped at head")
+        elif not inspector.get_indexes('users'):
+            stamp(revision=BASELINE_REVISION)
+            print("Existing database stamped at the baseline revision")
+        else:
+            raise SystemExit(
+                "Existing database has neither the baseline nor the current schema; "
+                "stamp its revision with `flask db stamp <revision>` and rerun"
+            )
 
-    db.create_all()
-    print("Database tables created successfully!")
+    upgrade()
+    print("Database migrated to the latest revision!")
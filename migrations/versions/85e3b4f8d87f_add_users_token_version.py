@@ -0,0 +1,33 @@
+"""add users token_version
+
+Revision ID: 85e3b4f8d87f
+Revises: 0d48a902118d
+Create Date: 2026-10-18 14:51:09.768617
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '85e3b4f8d87f'
+down_revision = '0d48a902118d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A plain ADD COLUMN: batch mode would recreate the table on SQLite and lose the
+    # lower() expression indexes, which it can't reflect
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.drop_index('ix_users_username_lower', table_name='users')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
+
+    op.create_index('ix_users_username_lower', 'users', [sa.text('lower(username)')], unique=False)
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=False)
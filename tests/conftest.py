@@ -0,0 +1,28 @@
+import pytest
+from flask_migrate import upgrade
+from app import create_app
+from app.config.config import Config
+from app.models.migrations import init_migrations
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        RATE_LIMIT_ENABLED = False
+        # Cheap hashes keep the login-heavy tests fast
+        PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+        PASSWORD_HASH_SLOTS_DIR = str(tmp_path / 'kdf-slots')
+
+    app = create_app(TestConfig)
+    init_migrations(app)
+    # The schema comes from the migrations, so a model index missing from them fails here too
+    with app.app_context():
+        upgrade()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
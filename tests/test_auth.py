@@ -0,0 +1,56 @@
+def signup_and_login(client, username='alice'):
+    response = client.post('/api/create', json={
+        'username': username, 'email': f'{username}@example.com', 'password': 'secret'
+    })
+    assert response.status_code == 201
+    response = client.post('/api/auth/login', json={'username': username, 'password': 'secret'})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_logout_revokes_existing_access_token(client):
+    tokens = signup_and_login(client)
+    user_id = tokens['user']['id']
+    assert client.get(f'/api/users/{user_id}', headers=bearer(tokens['token'])).status_code == 200
+
+    assert client.post('/api/auth/logout', headers=bearer(tokens['token'])).status_code == 200
+
+    response = client.get(f'/api/users/{user_id}', headers=bearer(tokens['token']))
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Token has been revoked'
+
+
+def test_refresh_rejects_refresh_token_issued_before_logout(client):
+    tokens = signup_and_login(client)
+    response = client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200
+
+    client.post('/api/auth/logout', headers=bearer(response.get_json()['token']))
+
+    response = client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Refresh token has been revoked'
+
+
+def test_refresh_token_is_not_accepted_as_access_token(client):
+    tokens = signup_and_login(client)
+
+    response = client.get(f"/api/users/{tokens['user']['id']}", headers=bearer(tokens['refresh_token']))
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Invalid token'
+
+
+def test_deleted_users_token_is_rejected(client):
+    tokens = signup_and_login(client)
+    other = signup_and_login(client, 'bob')
+    user_id = tokens['user']['id']
+    assert client.delete(f'/api/users/{user_id}', headers=bearer(tokens['token'])).status_code == 200
+
+    response = client.get(f"/api/users/{other['user']['id']}", headers=bearer(tokens['token']))
+    assert response.status_code == 401
+    response = client.post('/api/auth/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 401
@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.fixture
+def usernames(client):
+    names = [f'user{n}' for n in range(7)]
+    for name in names:
+        response = client.post('/api/create', json={
+            'username': name, 'email': f'{name}@example.com', 'password': 'secret'
+        })
+        assert response.status_code == 201
+    return names
+
+
+def fetch_all_pages(client, params):
+    pages = []
+    cursor = None
+    while True:
+        query = dict(params, limit=3, **({'after': cursor} if cursor else {}))
+        response = client.get('/api/users', query_string=query)
+        assert response.status_code == 200
+        body = response.get_json()
+        pages.append([user['username'] for user in body['users']])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize('sort, reverse', [('id', False), ('-username', True)])
+def test_next_cursor_walks_every_user_once(client, usernames, sort, reverse):
+    pages = fetch_all_pages(client, {'sort': sort})
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert [name for page in pages for name in page] == sorted(usernames, reverse=reverse)
+
+
+def test_invalid_cursor_is_rejected(client, usernames):
+    response = client.get('/api/users', query_string={'after': 'not-a-cursor'})
+    assert response.status_code == 400
@@ -0,0 +1,12 @@
+from app.models import db
+from app.utils.query_plans import check_access_paths
+
+
+def test_user_queries_use_their_indexes(app):
+    with app.app_context():
+        results = check_access_paths(db.engine)
+    failures = [
+        f"{name} -> {', '.join(indexes)}\n{plan}"
+        for name, indexes, uses_index, plan in results if not uses_index
+    ]
+    assert not failures, '\n\n'.join(failures)